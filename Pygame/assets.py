@@ -0,0 +1,196 @@
+# assets.py
+import hashlib
+import io
+import os
+import struct
+from collections import OrderedDict
+import pygame
+from config import ASSET_CACHE_DIR, ATLAS_MAX_WIDTH, GLYPH_CACHE_SIZE
+import tracing
+
+trace = tracing.channel('assets')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Decoded pixels on disk: header, then rows of RGB or RGBA bytes
+CACHE_MAGIC = b"ALIM"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("<4sHII?32s")  # magic, version, width, height, has alpha, source sha256
+CACHE_SUFFIX = ".pixels"
+
+# tobytes/frombytes replaced tostring/fromstring in pygame 2.1.3
+_to_bytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+_from_bytes = getattr(pygame.image, "frombytes", None) or pygame.image.fromstring
+
+# Loaded once per process and shared by every scene
+_images = {}
+_converted = set()  # _images keys already in the display format
+_atlases = {}
+_fonts = {}
+_glyphs = OrderedDict()  # Rendered text keyed on (font, text, colour), least recently used first
+_music = {}  # File contents of music read ahead, so starting it does not touch the disk
+
+def asset_path(file_path):
+    """Absolute path of a file given relative to the game directory."""
+    return os.path.join(BASE_DIR, file_path)
+
+def display_ready():
+    """convert() needs a display mode to convert to."""
+    return pygame.display.get_init() and pygame.display.get_surface() is not None
+
+def load_image(file_path, alpha=None, use_cache=True):
+    """Load an image once, converted to the display format as soon as a display exists.
+
+    alpha forces convert_alpha() (True) or convert() (False); by default it follows the file.
+    """
+    key = (file_path, alpha)
+    image = _images.get(key)
+    if image is not None and (key in _converted or not display_ready()):
+        return image
+    if image is None:
+        image = decode_image(file_path, use_cache)
+    if display_ready():
+        has_alpha = alpha if alpha is not None else bool(image.get_flags() & pygame.SRCALPHA)
+        image = image.convert_alpha() if has_alpha else image.convert()
+        _converted.add(key)
+    _images[key] = image
+    return image
+
+def preload_image(file_path, alpha=None):
+    """Decode an image into the shared cache without converting it, safe off the main thread.
+
+    The next load_image() call on the main thread only has to convert it.
+    """
+    key = (file_path, alpha)
+    if key not in _images:
+        _images[key] = decode_image(file_path)
+
+def decode_image(file_path, use_cache=True):
+    """Read an image file, through the decoded pixel cache when the source hash still matches."""
+    source_path = asset_path(file_path)
+    if not use_cache:
+        return pygame.image.load(source_path)
+    with open(source_path, "rb") as f:
+        source = f.read()
+    source_hash = hashlib.sha256(source).digest()
+    cache_path = os.path.join(asset_path(ASSET_CACHE_DIR), file_path.replace("/", "_") + CACHE_SUFFIX)
+
+    image = read_image_cache(cache_path, source_hash)
+    if image is None:
+        image = pygame.image.load(io.BytesIO(source), file_path)  # The name tells pygame the format
+        write_image_cache(cache_path, source_hash, image)
+    return image
+
+def read_image_cache(cache_path, source_hash):
+    """Surface from the cached pixels, or None if the cache is missing or stale."""
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < CACHE_HEADER.size:
+        return None
+    magic, version, width, height, has_alpha, cached_hash = CACHE_HEADER.unpack_from(data)
+    pixel_format = "RGBA" if has_alpha else "RGB"
+    if (magic != CACHE_MAGIC or version != CACHE_VERSION or cached_hash != source_hash
+            or len(data) != CACHE_HEADER.size + width * height * len(pixel_format)):
+        trace.info("Image cache %s is stale, rebuilding", cache_path)
+        return None
+    return _from_bytes(data[CACHE_HEADER.size:], (width, height), pixel_format)
+
+def write_image_cache(cache_path, source_hash, image):
+    if image.get_colorkey() is not None:
+        return  # Raw pixels would lose the colour key
+    has_alpha = bool(image.get_flags() & pygame.SRCALPHA)
+    pixels = _to_bytes(image, "RGBA" if has_alpha else "RGB")
+    header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, image.get_width(), image.get_height(),
+                               has_alpha, source_hash)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "wb") as f:
+            f.write(header)
+            f.write(pixels)
+    except OSError as e:
+        trace.warning("Could not write image cache %s: %s", cache_path, e)
+
+def preload_music(file_path):
+    """Read a music file into memory, safe off the main thread."""
+    if file_path not in _music:
+        with open(asset_path(file_path), "rb") as f:
+            _music[file_path] = f.read()
+
+def music_source(file_path):
+    """Arguments for pygame.mixer.music.load(): the preloaded bytes if there are any, else the path."""
+    data = _music.get(file_path)
+    if data is None:
+        return (asset_path(file_path),)
+    return (io.BytesIO(data), os.path.splitext(file_path)[1].lstrip("."))  # The extension tells SDL the format
+
+class SpriteAtlas:
+    """Small images packed into one surface, each found again by its file path as a sub-rect."""
+
+    def __init__(self, file_paths, padding=1, max_width=ATLAS_MAX_WIDTH):
+        images = [(file_path, load_image(file_path, alpha=True)) for file_path in file_paths]
+
+        # Shelf packing: tallest first, left to right, a new shelf once the row is full
+        images.sort(key=lambda item: item[1].get_height(), reverse=True)
+        self.rects = {}
+        x = y = shelf_height = width = 0
+        for file_path, image in images:
+            image_width, image_height = image.get_size()
+            if x and x + image_width > max_width:
+                x, y = 0, y + shelf_height + padding
+                shelf_height = 0
+            self.rects[file_path] = pygame.Rect(x, y, image_width, image_height)
+            x += image_width + padding
+            shelf_height = max(shelf_height, image_height)
+            width = max(width, x - padding)
+
+        self.surface = pygame.Surface((max(width, 1), max(y + shelf_height, 1)), pygame.SRCALPHA)
+        for file_path, image in images:
+            # MAX against the cleared surface copies alpha instead of blending it
+            self.surface.blit(image, self.rects[file_path], special_flags=pygame.BLEND_RGBA_MAX)
+        if display_ready():
+            self.surface = self.surface.convert_alpha()
+        self._subsurfaces = {}
+
+    def get(self, file_path):
+        """The packed image as a subsurface sharing the atlas pixels."""
+        subsurface = self._subsurfaces.get(file_path)
+        if subsurface is None:
+            subsurface = self._subsurfaces[file_path] = self.surface.subsurface(self.rects[file_path])
+        return subsurface
+
+    def frames(self, file_paths):
+        """Subsurfaces in order, e.g. the frames of one animation."""
+        return [self.get(file_path) for file_path in file_paths]
+
+    def blit(self, target, file_path, position):
+        return target.blit(self.surface, position, self.rects[file_path])
+
+def load_atlas(file_paths):
+    key = tuple(file_paths)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = SpriteAtlas(key)
+    return atlas
+
+def load_font(name, size):
+    """System font by name, or the pygame default font for None."""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.Font(pygame.font.match_font(name) if name else None, size)
+    return font
+
+def render_text(font, text, color, antialias=True):
+    """font.render() through a shared cache, for text that is drawn again and again."""
+    key = (font, text, color, antialias)
+    surface = _glyphs.get(key)
+    if surface is not None:
+        _glyphs.move_to_end(key)
+        return surface
+    surface = _glyphs[key] = font.render(text, antialias, color)
+    if len(_glyphs) > GLYPH_CACHE_SIZE:
+        _glyphs.popitem(last=False)
+    return surface
@@ -0,0 +1,175 @@
+# benchmarks.py
+"""Time pathfinding, map building, collision and rendering on synthetic maps of growing size.
+
+    python benchmarks.py --sizes 20 50 100 200 --output results.json
+    python benchmarks.py --baseline benchmark_baseline.json      # exit code 1 on regression
+    python benchmarks.py --save-baseline benchmark_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from config import *
+from map_generator import generate_map
+from map_resources import create_map
+from game_logic import bfs
+from flow_field import FlowField
+from tile_map import TileMap
+from collision import CollisionGrid
+from line_of_sight import LineOfSight
+from pathfinding import astar, HierarchicalPathfinder
+from path_cache import PathCache
+from rendering import FogRenderer, RadarRenderer
+from assets import load_image
+
+DEFAULT_SIZES = [20, 50, 100, 200, 500, 1000]
+CREATE_MAP_MAX_SIZE = 100  # One Wall sprite per tile, larger maps exhaust memory
+COLLISION_QUERIES = 1000
+HPA_MAX_SIZE = 500  # Building the abstract graph takes several seconds per run beyond this
+
+def time_call(func, warmup, repeat):
+    """Run func warmup times untimed, then repeat times timed. Returns milliseconds per run."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func()
+        timings.append((time.perf_counter_ns() - start) / 1e6)
+    return timings
+
+def floor_tiles(map_layout):
+    return [(row, col) for row, line in enumerate(map_layout) for col, tile in enumerate(line) if tile == ' ']
+
+def map_benchmarks(size, wall_density, corridors):
+    """(name, callable) pairs for one synthetic map."""
+    map_layout = generate_map(size, size, wall_density, corridors, seed=size)
+    tile_map = TileMap.from_layout(map_layout)
+    tiles = floor_tiles(map_layout)
+    start, goal = tiles[0], tiles[-1]  # Opposite corners of the map
+    benchmarks = [("bfs", lambda: bfs(map_layout, start, goal))]
+    walkable = tile_map.mask(" ")
+    benchmarks.append(("astar", lambda: astar(walkable, size, size, start, goal)))
+    if size <= HPA_MAX_SIZE:
+        pathfinder = HierarchicalPathfinder(tile_map)
+        benchmarks.append(("hpa", lambda: pathfinder.path(start, goal)))
+        benchmarks.append(("hpa_build", lambda: HierarchicalPathfinder(tile_map)))
+        path_cache = PathCache(pathfinder.path)
+        benchmarks.append(("path_cache", lambda: path_cache.path(start, goal)))  # Hits after the warmup
+
+    flow_field = FlowField(tile_map)
+    goals = [start, goal]
+
+    def update_flow_field():
+        # Alternate the goal so every call rebuilds the field
+        goals.reverse()
+        flow_field.update(goals[0])
+
+    benchmarks.append(("flow_field", update_flow_field))
+
+    if size <= CREATE_MAP_MAX_SIZE:
+        benchmarks.append(("create_map", lambda: create_map(map_layout)))
+
+    collision_grid = CollisionGrid(tile_map)
+    rng = random.Random(size)
+    rects = [pygame.Rect(rng.randrange(size * TILE_SIZE), rng.randrange(size * TILE_SIZE),
+                         TILE_SIZE // 2, TILE_SIZE // 2) for _ in range(COLLISION_QUERIES)]
+    benchmarks.append(("collision", lambda: [collision_grid.collides(rect) for rect in rects]))
+    benchmarks.append(("line_of_sight", lambda: LineOfSight(tile_map)))
+    return benchmarks
+
+def screen_benchmarks():
+    """Rendering entry points whose cost depends on the window, not the map."""
+    target = pygame.Surface((WIDTH, HEIGHT))
+    fog = FogRenderer()
+    radar = RadarRenderer(RADAR_CENTER, RADAR_RADIUS)
+    for step in range(radar.angle_steps):  # Measure compositing, not the one-off trail renders
+        radar.get_trail(step * 360 / radar.angle_steps)
+    sweep = [0]
+    images = [load_image("assets/door.png"), load_image("assets/jumpscare1.png")]  # Converted to the display format
+
+    def draw_radar():
+        sweep[0] = (sweep[0] + 2) % 360
+        radar.draw(target, (WIDTH // 2, HEIGHT // 2), [(WIDTH // 2 + 100, HEIGHT // 2)], sweep[0])
+
+    return [
+        ("fog", lambda: [fog.update((WIDTH // 2, HEIGHT // 2), 0), fog.draw(target)]),
+        ("draw_radar", draw_radar),
+        ("blit_images", lambda: [target.blit(image, (0, 0)) for image in images]),
+    ]
+
+def summarize(name, size, timings):
+    return {"name": name, "size": size, "repeat": len(timings),
+            "min_ms": round(min(timings), 4),
+            "median_ms": round(statistics.median(timings), 4),
+            "mean_ms": round(statistics.fmean(timings), 4)}
+
+def run(sizes, warmup, repeat, wall_density, corridors):
+    results = []
+    for name, func in screen_benchmarks():
+        results.append(summarize(name, "screen", time_call(func, warmup, repeat)))
+        print(f"{name:<16}{'screen':>8}{results[-1]['median_ms']:>12.3f} ms", file=sys.stderr)
+    for size in sizes:
+        for name, func in map_benchmarks(size, wall_density, corridors):
+            results.append(summarize(name, size, time_call(func, warmup, repeat)))
+            print(f"{name:<16}{size:>8}{results[-1]['median_ms']:>12.3f} ms", file=sys.stderr)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Print each benchmark against the baseline. Returns the regressions."""
+    previous = {(entry["name"], entry["size"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["name"], entry["size"]))
+        if old is None or old["median_ms"] <= 0:
+            continue
+        ratio = entry["median_ms"] / old["median_ms"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{entry['name']:<16}{entry['size']:>8}{old['median_ms']:>12.3f}{entry['median_ms']:>12.3f}"
+              f"{ratio:>8.2f}x {flag}", file=sys.stderr)
+        if flag:
+            regressions.append(entry)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="square map sizes in tiles")
+    parser.add_argument("--wall-density", type=float, default=0.3)
+    parser.add_argument("--no-corridors", action="store_true", help="scatter walls instead of carving a maze")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this file instead of stdout")
+    parser.add_argument("--baseline", help="compare against a stored results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("--save-baseline", help="also store the results as the new baseline")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))  # Images are converted to this format
+    report = {
+        "meta": {"python": platform.python_version(), "pygame": pygame.version.ver,
+                 "machine": platform.machine(), "timestamp": time.time(),
+                 "wall_density": args.wall_density, "corridors": not args.no_corridors},
+        "results": run(args.sizes, args.warmup, args.repeat, args.wall_density, not args.no_corridors),
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+    if not args.output:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report["results"], json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# camera.py
+import pygame
+from config import WIDTH, HEIGHT
+
+class Camera:
+    """The part of the map shown in the window, following a target.
+
+    rect is in map pixels. Where the map is larger than the window the camera scrolls but
+    stays inside the map; where it is smaller the map is centred in the window.
+    """
+
+    def __init__(self, view_size=(WIDTH, HEIGHT), world_size=(WIDTH, HEIGHT)):
+        self.rect = pygame.Rect((0, 0), view_size)
+        self.world_size = world_size
+
+    @property
+    def world_rect(self):
+        return pygame.Rect((0, 0), self.world_size)
+
+    def set_world(self, world_size):
+        self.world_size = world_size
+
+    def follow(self, center):
+        """Centre the view on center where the map allows it. Returns True if the view moved."""
+        previous = self.rect.topleft
+        position = []
+        for target, view, world in zip(center, self.rect.size, self.world_size):
+            if world <= view:
+                position.append((world - view) // 2)
+            else:
+                position.append(min(max(target - view // 2, 0), world - view))
+        self.rect.topleft = position
+        return self.rect.topleft != previous
+
+    def to_screen(self, position):
+        return (position[0] - self.rect.x, position[1] - self.rect.y)
+
+    def to_screen_rect(self, rect):
+        return rect.move(-self.rect.x, -self.rect.y)
+
+    def to_world_rect(self, rect):
+        """Map area shown by a rect of the window."""
+        return rect.move(self.rect.x, self.rect.y)
+
+    def visible(self, rect):
+        """True if any of rect, in map pixels, is in view."""
+        return self.rect.colliderect(rect)
+
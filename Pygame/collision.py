@@ -0,0 +1,30 @@
+# collision.py
+from config import TILE_SIZE
+
+class CollisionGrid:
+    """Wall lookup by tile, so a collision test only touches the tiles a rect overlaps."""
+
+    def __init__(self, tile_map, solid_tiles="W"):
+        self.rows, self.cols = tile_map.rows, tile_map.cols
+        self.solid = tile_map.mask(solid_tiles)  # Row-major, 1 for solid tiles
+
+    def is_solid(self, row, col):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.solid[row * self.cols + col] == 1
+        return False
+
+    def collides(self, rect):
+        """Same result as colliderect against every wall sprite, for any rect size."""
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        first_row = max(rect.top // TILE_SIZE, 0)
+        last_row = min((rect.bottom - 1) // TILE_SIZE, self.rows - 1)
+        first_col = max(rect.left // TILE_SIZE, 0)
+        last_col = min((rect.right - 1) // TILE_SIZE, self.cols - 1)
+        solid, cols = self.solid, self.cols
+        for row in range(first_row, last_row + 1):
+            base = row * cols
+            for col in range(first_col, last_col + 1):
+                if solid[base + col]:
+                    return True
+        return False
@@ -5,6 +5,12 @@ WIDTH, HEIGHT = 1600, 1600  # 遊戲窗口大小
 TILE_SIZE = 80  # 每個瓦片的像素大小
 FPS = 60  # 遊戲刷新率
 
+# Simulation settings
+STEP_RATE = 60  # Fixed simulation steps per second, independent of the frame rate
+STEP_DT = 1 / STEP_RATE
+MAX_STEPS_PER_FRAME = 5  # Steps caught up per frame at most, the rest of a long stall is dropped
+RECORDING_FILE = "last_session.rec"  # Inputs of the last session, replayed with replay.py
+
 # Gameplay constants
 DISTANCE_THRESHOLD = 300  # 追蹤者進入追蹤狀態的距離閾值
 WANDER_INTERVAL = 10.0  # 游蕩模式目標更換的間隔時間（秒）
@@ -14,7 +20,25 @@ FOLLOW_SPEED = 300  # 追蹤模式速度
 RUN_SPEED = 250  # 玩家奔跑速度
 SNEAK_SPEED = 50  # 玩家潛行速度
 VISIBILITY_RADIUS = 200  # 玩家可見區域半徑
+GRADIENT_CACHE_SIZE = 64  # 快取的迷霧漸層數量上限
+FOG_MASK_SCALE = 1  # Fog masks are rendered at 1/scale size and upscaled, 1 for full resolution
 MIN_TARGET_DISTANCE = 100  # 追蹤者與目標之間的最小距離
+TRACKER_COUNT = 1  # 每個關卡的追蹤者數量
+SPAWN_GOAL_DISTANCE = 12  # Tiles, the player spawns farther than this from the goal
+SPAWN_TRACKER_DISTANCE = 8  # Tiles, trackers spawn farther than this from the player
+
+# Pathfinding settings
+DISTANCE_TABLE_MAX_TILES = 2048  # 超過此可走瓦片數的地圖不建立全點對距離表
+HPA_CLUSTER_SIZE = 10  # Tiles per side of a hierarchical pathfinding cluster
+PATH_CACHE_MAX_TILES = 16384  # Path tiles kept across every cached path before the least recent are dropped
+LINE_OF_SIGHT_RANGE = 12  # Tiles, covers the sprint detection distance; sight is not stored beyond it
+FLOW_FIELD_MAX_DISTANCE = 40  # Steps from the player the follow field is built to, well past the sprint detection distance
+LOCAL_WANDER_RANGE = 10  # Tiles, wander targets and their path search stay this close to a tracker on streamed maps
+
+# Streaming settings
+CHUNK_SIZE = 10  # Tiles per side of a streamed map chunk
+CHUNK_MARGIN = 4  # Tiles beyond the view that are loaded ahead; chunks twice as far out are dropped
+BAKE_MAX_TILES = 1600  # Levels up to this many tiles get one baked background, larger ones are streamed
 
 # Colors
 WHITE = (50, 60, 60)  # 白色背景
@@ -31,3 +55,23 @@ RED = (160, 160, 0)  # 玩家
 RADAR_CENTER = (WIDTH - 250, 250)  # Position on screen
 RADAR_RADIUS = 200
 SWEEP_SPEED = 120  # Degrees per second
+RADAR_ANGLE_STEPS = 180  # Number of pre-rendered sweep trail angles
+
+# Tracing settings
+TRACE_BUFFER_SIZE = 2000  # Trace records kept in memory for dumps
+TRACE_DUMP_FILE = "trace_dump.jsonl"  # Written on game over or crash
+
+# Profiler settings
+PROFILE_WINDOW = 600  # Frames used for rolling percentiles
+PROFILE_BIN_US = 250  # Histogram bin width in microseconds
+PROFILE_BINS = 200  # Histogram bins, the last one collects slower frames
+PROFILE_EXPORT_PATH = "frame_profile"  # Histograms written to .json and .csv at exit
+
+# Scene settings
+MENU_FPS = 30  # Frame rate of the menu, credits and game over screens
+STARTUP_LOG = "startup_times.jsonl"  # Startup and scene switch times, one JSON line per run
+
+# Asset settings
+ASSET_CACHE_DIR = ".asset_cache"  # Decoded image pixels, rebuilt when the source file changes
+ATLAS_MAX_WIDTH = 1024  # Sprite atlas width before packing starts a new row
+GLYPH_CACHE_SIZE = 256  # Rendered text surfaces kept for reuse
@@ -0,0 +1,87 @@
+# flow_field.py
+from array import array
+from collections import deque
+from config import FLOW_FIELD_MAX_DISTANCE
+
+UNREACHABLE = -1
+
+class FlowField:
+    """Distance map rooted at one goal tile, shared by every tracker that follows it.
+
+    The search stops max_distance steps from the goal, since a chase ends once the player is
+    out of detection range; tiles farther out are left UNREACHABLE. None searches the whole map.
+    """
+
+    def __init__(self, tile_map, max_distance=FLOW_FIELD_MAX_DISTANCE):
+        self.rows, self.cols = tile_map.rows, tile_map.cols
+        self.walkable = tile_map.mask(" ")  # Row-major, 1 for floor tiles
+        self.max_distance = max_distance
+        self.distances = array('i', [UNREACHABLE]) * (self.rows * self.cols)
+        self.reached = []  # Indices set by the last rebuild, cleared on the next one
+        self.goal = None
+        self.version = 0  # Bumped every time the field is rebuilt
+
+    def update(self, goal):
+        """Rebuild the distance map if the goal moved to another tile. Returns True on rebuild."""
+        if goal == self.goal:
+            return False
+        self.goal = goal
+        self.version += 1
+
+        rows, cols, walkable = self.rows, self.cols, self.walkable
+        distances = self.distances
+        for index in self.reached:
+            distances[index] = UNREACHABLE
+        reached = self.reached = []
+        row, col = goal
+        if not (0 <= row < rows and 0 <= col < cols):
+            return True
+
+        start = row * cols + col
+        distances[start] = 0
+        reached.append(start)
+        queue = deque([start])
+        last_distance = self.max_distance if self.max_distance is not None else rows * cols
+        while queue:
+            current = queue.popleft()
+            next_distance = distances[current] + 1
+            if next_distance > last_distance:
+                break  # Breadth first, so everything left in the queue is as far
+            col = current % cols
+            for neighbour in (current - cols if current >= cols else -1,
+                              current + cols if current + cols < rows * cols else -1,
+                              current - 1 if col > 0 else -1,
+                              current + 1 if col < cols - 1 else -1):
+                if neighbour >= 0 and walkable[neighbour] and distances[neighbour] == UNREACHABLE:
+                    distances[neighbour] = next_distance
+                    reached.append(neighbour)
+                    queue.append(neighbour)
+        return True
+
+    def distance(self, tile):
+        row, col = tile
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.distances[row * self.cols + col]
+        return UNREACHABLE
+
+    def next_step(self, tile):
+        """Return the neighbouring tile one step closer to the goal, or None."""
+        current = self.distance(tile)
+        if current <= 0:
+            return None
+        for d in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            neighbour = (tile[0] + d[0], tile[1] + d[1])
+            if self.distance(neighbour) == current - 1:
+                return neighbour
+        return None
+
+    def path_from(self, start):
+        """Follow the field from start to the goal, in the same format bfs returns."""
+        if self.distance(start) == UNREACHABLE:
+            return []
+        path = [start]
+        step = self.next_step(start)
+        while step is not None:
+            path.append(step)
+            step = self.next_step(step)
+        return path
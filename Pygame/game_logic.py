@@ -1,6 +1,9 @@
 # game_logic.py
-import math
+import numpy as np
 from collections import deque
+import tracing
+
+trace = tracing.channel('pathfinding')
 
 def bfs(map_layout, start, goal):
     rows, cols = len(map_layout), len(map_layout[0])
@@ -16,7 +19,7 @@ def bfs(map_layout, start, goal):
             while current is not None:
                 path.append(current)
                 current = parent[current]
-            print(f"BFS path found: {path}")  # Debug 輸出
+            trace.debug("BFS path found from %s to %s, %d tiles", start, goal, len(path))
             return path[::-1]
 
         for d in directions:
@@ -27,19 +30,18 @@ def bfs(map_layout, start, goal):
                 visited.add((nx, ny))
                 parent[(nx, ny)] = current
 
-    print(f"BFS: No path found from {start} to {goal}")  # Debug 輸出
+    trace.debug("BFS: No path found from %s to %s", start, goal)
     return []
 
-def move_towards_target(character, target, dt):
-    dx = target[0] - character.rect.centerx
-    dy = target[1] - character.rect.centery
-    distance = math.hypot(dx, dy)
+def move_towards_targets(positions, targets, speeds, dt):
+    """Move rows of (x, y) positions towards their targets at their speeds, updated in place.
 
-    if distance < 5:
-        return True
-    else:
-        move_x = (dx / distance) * character.speed * dt
-        move_y = (dy / distance) * character.speed * dt
-        character.rect.x += move_x
-        character.rect.y += move_y
-        return False
+    Returns a boolean array marking the rows that had already reached their target.
+    """
+    offset = targets - positions
+    distance = np.hypot(offset[:, 0], offset[:, 1])
+    reached = distance < 5
+    moving = ~reached
+    step = (speeds[moving] * dt / distance[moving])[:, None]
+    positions[moving] += offset[moving] * step
+    return reached
@@ -2,10 +2,11 @@ import math
 import pygame
 import random
 from config import *
-from game_logic import bfs, move_towards_target
-from map_resources import load_map, create_map
+from game_logic import bfs
+from swarm import Swarm, STATES
+import tracing
 
-map_layout = load_map("map/map1.txt")
+trace = tracing.channel('ai')
 
 # Calculate the center position of a tile in pixels
 def get_tile_position(tile_row, tile_col):
@@ -23,8 +24,24 @@ class Creature(pygame.sprite.Sprite):
         self.speed = speed
 
     def update_position(self, dx, dy):
-        self.rect.x += dx
-        self.rect.y += dy
+        rect = self.rect
+        rect.x += dx
+        rect.y += dy
+        self.rect = rect  # Write back for trackers, whose rect is a view
+
+    def move_with_collision(self, dx, dy, collision_grid):
+        """Move by (dx, dy), dropping each axis whose move would end inside a wall."""
+        rect = self.rect
+        new_rect_x = rect.copy()
+        new_rect_x.x = rect.x + dx
+        new_rect_y = rect.copy()
+        new_rect_y.y = rect.y + dy
+
+        if not collision_grid.collides(new_rect_x):
+            rect.x = new_rect_x.x
+        if not collision_grid.collides(new_rect_y):
+            rect.y = new_rect_y.y
+        self.rect = rect
 
     def update_color(self, new_color):
         if self.color != new_color:
@@ -50,10 +67,37 @@ class Player(Creature):
         self.update_position(dx, dy)
 
 
+class SwarmField:
+    """Tracker attribute stored in one row of a Swarm array."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, tracker, owner=None):
+        if tracker is None:
+            return self
+        return getattr(tracker.swarm, self.name)[tracker.index].item()
+
+    def __set__(self, tracker, value):
+        getattr(tracker.swarm, self.name)[tracker.index] = value
+
 # Define the Tracker class
 class Tracker(Creature):
-    def __init__(self, x, y, color, wander_speed, follow_speed, visibility_radius):
+    """A single alien. Its numeric state lives in a shared Swarm, so many trackers update in one batch."""
+
+    speed = SwarmField('speed')
+    wander_speed = SwarmField('wander_speed')
+    follow_speed = SwarmField('follow_speed')
+    wander_timer = SwarmField('wander_timer')
+    waiting_timer = SwarmField('waiting_timer')
+    teleport_timer = SwarmField('teleport_timer')
+
+    def __init__(self, x, y, color, wander_speed, follow_speed, visibility_radius, swarm=None, rng=None):
+        self.swarm = swarm if swarm is not None else Swarm(capacity=1)
+        self.rng = rng if rng is not None else random  # The session's generator, so runs can be replayed
+        self.index = self.swarm.add(self)
         super().__init__(x, y, color, speed=wander_speed)
+        self.swarm.size[self.index] = self.image.get_width()
         self.wander_speed = wander_speed
         self.follow_speed = follow_speed
         self.visibility_radius = visibility_radius
@@ -65,15 +109,60 @@ class Tracker(Creature):
         self.waiting_timer = 0
         self.previous_target_tile = None  # To prevent backtracking
         self.teleport_timer = 0
-
-    def initialize_tracker_target(self, state, map_layout, walkable_tiles, player=None):
+        self.flow_field_version = None  # Flow field version the follow path was taken from
+
+    @property
+    def rect(self):
+        """A copy placed at the swarm position. Changing it moves nothing; assign it back to move."""
+        rect = self.image.get_rect()
+        rect.center = self.swarm.position[self.index]
+        return rect
+
+    @rect.setter
+    def rect(self, rect):
+        self.swarm.position[self.index] = rect.center
+
+    @property
+    def state(self):
+        return STATES[self.swarm.state[self.index]]
+
+    @state.setter
+    def state(self, state):
+        self.swarm.state[self.index] = STATES.index(state)
+
+    @property
+    def current_target(self):
+        if not self.swarm.has_target[self.index]:
+            return None
+        return tuple(self.swarm.target[self.index].tolist())
+
+    @current_target.setter
+    def current_target(self, target):
+        self.swarm.has_target[self.index] = target is not None
+        if target is not None:
+            self.swarm.target[self.index] = target
+
+    def initialize_tracker_target(self, state, map_layout, walkable_tiles, player=None, flow_field=None,
+                                  reachability=None):
         if state == 'wander':
-            print("\nTracker State: Wander")
+            trace.info("Tracker State: Wander")
             self.update_color(BLUE)
+            if reachability is not None:
+                # Single draw from the precomputed set of qualifying tiles
+                current_tile = (self.rect.centery // TILE_SIZE, self.rect.centerx // TILE_SIZE)
+                target_tile = reachability.pick_wander_target(current_tile, self.rect.center,
+                                                              self.previous_target_tile, self.rng)
+                if target_tile is not None:
+                    path = reachability.path(current_tile, target_tile)
+                    if path:  # Streamed maps only search around the tracker, so a target may be out of reach
+                        self.set_wander_path(path, target_tile)
+                        return
+                self.start_waiting()
+                return
             attempts = 0
             max_attempts = 100
             while attempts < max_attempts:
-                tile = random.choice(walkable_tiles)
+                tile = self.rng.choice(walkable_tiles)
                 target_tile = (tile[0], tile[1])
                 current_tile = (self.rect.centery // TILE_SIZE, self.rect.centerx // TILE_SIZE)
                 if target_tile != current_tile and target_tile != self.previous_target_tile:
@@ -83,31 +172,25 @@ class Tracker(Creature):
                         distance = math.hypot(target_pos[0] - self.rect.centerx,
                                               target_pos[1] - self.rect.centery)
                         if distance >= MIN_TARGET_DISTANCE:
-                            self.path = candidate_path
-                            self.path_index = 1
-                            self.current_target = get_tile_position(
-                                self.path[self.path_index][0],
-                                self.path[self.path_index][1]
-                            )
-                            self.previous_target_tile = target_tile
-                            self.wander_timer = 0
-                            print(f"Wander: New target set at {self.current_target}")
+                            self.set_wander_path(candidate_path, target_tile)
                             return
                 attempts += 1
             # If no valid target found after max attempts, switch to 'waiting'
-            self.state = 'waiting'
-            self.speed = 0  # Stop moving
-            self.update_color(YELLOW)
-            self.waiting_timer = 0
-            print("Wander: No valid target found. Switching to 'waiting' state.")
+            self.start_waiting()
 
         elif state == 'follow' and player:
-            print("\nTracker State: Follow")
+            trace.info("Tracker State: Follow")
             self.update_color(GREEN)
             player_tile = (player.rect.centery // TILE_SIZE, player.rect.centerx // TILE_SIZE)
             tracker_tile = (self.rect.centery // TILE_SIZE, self.rect.centerx // TILE_SIZE)
             if player_tile != tracker_tile:
-                candidate_path = bfs(map_layout, tracker_tile, player_tile)
+                if flow_field is not None:
+                    # Shared distance map rooted at the player, no per-tracker search needed
+                    flow_field.update(player_tile)
+                    self.flow_field_version = flow_field.version
+                    candidate_path = flow_field.path_from(tracker_tile)
+                else:
+                    candidate_path = bfs(map_layout, tracker_tile, player_tile)
                 if candidate_path and len(candidate_path) > 1:
                     self.path = candidate_path
                     self.path_index = 1
@@ -116,77 +199,53 @@ class Tracker(Creature):
                         self.path[self.path_index][1]
                     )
                     self.speed = self.follow_speed
-                    print(f"Follow: New target set at {self.current_target}")
+                    trace.debug("Follow: New target set at %s", self.current_target)
                 else:
                     self.current_target = None
-                    print("Follow: No path to player.")
+                    trace.info("Follow: No path to player.")
             else:
                 self.current_target = None
-                print("Follow: Tracker is already on the player's tile.")
+                trace.debug("Follow: Tracker is already on the player's tile.")
+
+    def set_wander_path(self, path, target_tile):
+        self.path = path
+        self.path_index = 1
+        self.current_target = get_tile_position(
+            self.path[self.path_index][0],
+            self.path[self.path_index][1]
+        )
+        self.previous_target_tile = target_tile
+        self.wander_timer = 0
+        trace.debug("Wander: New target set at %s", self.current_target)
+
+    def start_waiting(self):
+        self.state = 'waiting'
+        self.speed = 0  # Stop moving
+        self.update_color(YELLOW)
+        self.waiting_timer = 0
+        trace.info("Wander: No valid target found. Switching to 'waiting' state.")
 
     def teleport_to_random_tile(self, walkable_tiles):
-        random_tile = random.choice(walkable_tiles)
-        self.rect.centerx = random_tile[2]
-        self.rect.centery = random_tile[3]
+        random_tile = self.rng.choice(walkable_tiles)
+        self.swarm.position[self.index] = (random_tile[2], random_tile[3])
         self.current_target = None
         self.path = []
-        print(f"Tracker teleported to {self.rect.center}")
-
-    def move_along_path(self, dt):
-        if self.current_target is None:
-            return False
-
-        reached = move_towards_target(self, self.current_target, dt)
-        if reached:
-            self.path_index += 1
-            if self.path_index < len(self.path):
-                self.current_target = get_tile_position(
-                    self.path[self.path_index][0],
-                    self.path[self.path_index][1]
-                )
-                print(f"Tracker: Moving to next path tile index {self.path_index}, target {self.current_target}")
-            else:
-                if self.state == 'wander':
-                    print("Wander: Reached end of path. Selecting new wander target.")
-                    self.current_target = None
-                elif self.state == 'follow':
-                    print("Follow: Reached end of path.")
-                    self.current_target = None
-            return True
-        return False
-
-    def update(self, dt, player, map_layout, walkable_tiles):
-        # Update based on state
-        print(f"Updating Tracker - State: {self.state}, Current Target: {self.current_target}")  # Debug
-
-        if self.state == 'wander':
-            self.wander_timer += dt
-            if self.wander_timer >= WANDER_INTERVAL or self.current_target is None:
-                print(f"Wander: {WANDER_INTERVAL} seconds elapsed or no current target. Selecting new target.")
-                self.initialize_tracker_target('wander', map_layout, walkable_tiles)
-
-            if self.current_target:
-                self.move_along_path(dt)
-
-        elif self.state == 'follow':
-            if self.current_target is None:
-                self.initialize_tracker_target('follow', map_layout, walkable_tiles, player)
-            else:
-                self.move_along_path(dt)
-
-        elif self.state == 'waiting':
-            self.waiting_timer += dt
-            if self.waiting_timer >= WAITING_DURATION:
-                print("Waiting: Switching back to 'wander' state.")
-                self.state = 'wander'
-                self.speed = self.wander_speed
-                self.update_color(BLUE)
-                self.waiting_timer = 0
-                self.initialize_tracker_target('wander', map_layout, walkable_tiles)
-
-        # Teleport only if not in 'follow' state
-        if self.state != 'follow':
-            self.teleport_timer += dt
-            if self.teleport_timer >= 30.0:  # 30 seconds
-                self.teleport_to_random_tile(walkable_tiles)
-                self.teleport_timer = 0
+        trace.info("Tracker teleported to %s", self.rect.center)
+
+    def advance_path(self):
+        """Target the next tile of the path after the current one has been reached."""
+        self.path_index += 1
+        if self.path_index < len(self.path):
+            self.current_target = get_tile_position(
+                self.path[self.path_index][0],
+                self.path[self.path_index][1]
+            )
+            if trace.enabled(tracing.DEBUG):  # Runs for every tile of every tracker, skip the call when off
+                trace.debug("Tracker: Moving to next path tile index %d, target %s", self.path_index, self.current_target)
+        else:
+            if self.state == 'wander':
+                trace.debug("Wander: Reached end of path. Selecting new wander target.")
+                self.current_target = None
+            elif self.state == 'follow':
+                trace.debug("Follow: Reached end of path.")
+                self.current_target = None
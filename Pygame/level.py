@@ -0,0 +1,98 @@
+# level.py
+from concurrent.futures import ThreadPoolExecutor
+from config import *
+from map_resources import create_map
+from tile_map import TileMap, FloorTiles
+from collision import CollisionGrid
+from reachability import Reachability, LocalReachability
+from line_of_sight import LineOfSight, RayLineOfSight
+from world import ChunkedWorld
+from spawns import SpawnIndex
+from pathfinding import HierarchicalPathfinder
+from path_cache import PathCache
+from rendering import bake_background
+import tracing
+
+trace = tracing.channel('level')
+
+class Level:
+    """Everything built from one map file that stays the same while the level is played."""
+
+    def __init__(self, file_path, bake=False):
+        self.file_path = file_path
+        self.tile_map = TileMap.load(file_path)
+        self.map_layout = self.tile_map.layout
+        self.streamed = self.tile_map.rows * self.tile_map.cols > BAKE_MAX_TILES
+        if self.streamed:
+            # Too large to build per tile: collision and sight go through the chunks they touch,
+            # trackers wander and search paths around themselves
+            self.world = ChunkedWorld.from_tile_map(self.tile_map, bake=False)
+            self.walkable_tiles = FloorTiles(self.tile_map)
+            self.collision_grid = self.world
+            self.pathfinder = self.path_cache = None
+            self.reachability = LocalReachability(self.tile_map)
+            self.line_of_sight = RayLineOfSight(self.world)
+        else:
+            self.world = None
+            self.walkable_tiles = self.tile_map.walkable_tiles
+            self.collision_grid = CollisionGrid(self.tile_map)
+            self.pathfinder = HierarchicalPathfinder(self.tile_map)
+            self.path_cache = PathCache(self.pathfinder.path)  # Call invalidate() whenever a tile changes
+            self.reachability = Reachability(self.map_layout, self.walkable_tiles, pathfinder=self.path_cache)
+            self.line_of_sight = LineOfSight(self.tile_map)
+
+        # Goal tile (marked as 'G' in the map), located when the map was compiled
+        self.goal_tile = self.tile_map.goal_position()
+        if not self.goal_tile:
+            raise ValueError(f"No goal ('G') found in {file_path}.")
+
+        # Spawn tiles, checked here so a map without any fails at load instead of at every restart
+        try:
+            self.spawns = SpawnIndex(self.tile_map, self.reachability)
+        except ValueError as e:
+            raise ValueError(f"{e} ({file_path})") from e
+
+        # Floor and walls drawn once, converted to the display format by whoever shows the level.
+        # Streamed levels bake each chunk of self.world as it comes into view instead
+        self.size = (self.tile_map.cols * TILE_SIZE, self.tile_map.rows * TILE_SIZE)  # In pixels
+        self.walls = None
+        self.background = None
+        if bake and not self.streamed:
+            self.walls, _ = create_map(self.map_layout)
+            self.background = bake_background(self.walls, self.size, convert=False)
+
+class LevelLoader:
+    """Builds levels on a worker thread ahead of time, so switching level is a lookup.
+
+    The first level is kept for restarts, the others are dropped once they are left behind.
+    """
+
+    def __init__(self, levels, bake=False):
+        self.levels = levels
+        self.bake = bake
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-loader")
+        self.pending = {}  # level index -> Future of its Level
+
+    def preload(self, level_index):
+        """Start building a level in the background if it is not built or queued already."""
+        if 0 <= level_index < len(self.levels) and level_index not in self.pending:
+            trace.debug("Preloading level %d", level_index)
+            self.pending[level_index] = self.executor.submit(Level, self.levels[level_index], self.bake)
+
+    def get(self, level_index):
+        """Return the built level, waiting for the worker only if it has not finished yet."""
+        self.preload(level_index)
+        future = self.pending[level_index]
+        if not future.done():
+            trace.info("Level %d was not preloaded in time, waiting for it", level_index)
+        level = future.result()
+
+        # Keep the first level for restarts and the current one, and start on the next
+        for index in list(self.pending):
+            if index not in (0, level_index):
+                del self.pending[index]
+        self.preload(level_index + 1)
+        return level
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
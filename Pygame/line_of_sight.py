@@ -0,0 +1,137 @@
+# line_of_sight.py
+import numpy as np
+from config import LINE_OF_SIGHT_RANGE
+
+def ray_tiles(dr, dc):
+    """Tiles crossed by the segment between the centres of (0, 0) and (dr, dc), endpoints excluded.
+
+    Where the segment passes exactly through a tile corner, both tiles beside the corner count,
+    so a gap between two diagonal walls blocks sight.
+    """
+    tiles = []
+    rows, cols = abs(dr), abs(dc)
+    step_r = 1 if dr > 0 else -1
+    step_c = 1 if dc > 0 else -1
+    row = col = crossed_rows = crossed_cols = 0
+    while crossed_rows < rows or crossed_cols < cols:
+        # Compare when the segment reaches the next row and the next column boundary
+        decision = (1 + 2 * crossed_cols) * rows - (1 + 2 * crossed_rows) * cols
+        if decision == 0:
+            tiles.append((row + step_r, col))
+            tiles.append((row, col + step_c))
+            row, col = row + step_r, col + step_c
+            crossed_rows, crossed_cols = crossed_rows + 1, crossed_cols + 1
+        elif decision < 0:
+            col += step_c
+            crossed_cols += 1
+        else:
+            row += step_r
+            crossed_rows += 1
+        tiles.append((row, col))
+    return tiles[:-1]
+
+class LineOfSight:
+    """Which tiles can see each other within a range, built once per level.
+
+    Every tile has a bitset with one bit per offset in a circle of max_range tiles around it.
+    A line is clear when no wall tile lies on the segment between the two tile centres. Rays
+    are the same for every tile, so each offset is tested for the whole map in one NumPy pass.
+    """
+
+    def __init__(self, tile_map, max_range=LINE_OF_SIGHT_RANGE, opaque_tiles="W"):
+        self.rows, self.cols = rows, cols = tile_map.rows, tile_map.cols
+        self.max_range = reach = max_range
+        clear = np.frombuffer(tile_map.mask(opaque_tiles), dtype=np.uint8).reshape(rows, cols) == 0
+        padded = np.pad(clear, reach, constant_values=False)  # Outside the map blocks sight
+
+        def shifted(dr, dc):
+            """clear of the tile at (row + dr, col + dc), for every (row, col) at once."""
+            return padded[reach + dr:reach + dr + rows, reach + dc:reach + dc + cols]
+
+        offsets = [(dr, dc) for dr in range(-reach, reach + 1) for dc in range(-reach, reach + 1)
+                   if dr * dr + dc * dc <= reach * reach]
+        self.offset_bit = np.full((2 * reach + 1, 2 * reach + 1), -1, dtype=np.int32)
+        self.bits = np.zeros((rows * cols, (len(offsets) + 7) // 8), dtype=np.uint8)
+        for bit, (dr, dc) in enumerate(offsets):
+            self.offset_bit[dr + reach, dc + reach] = bit
+            visible = clear & shifted(dr, dc)
+            for ray_dr, ray_dc in ray_tiles(dr, dc):
+                visible &= shifted(ray_dr, ray_dc)
+            self.bits[:, bit >> 3] |= visible.ravel().astype(np.uint8) << (7 - (bit & 7))
+
+    def can_see(self, tile_a, tile_b):
+        """True if tile_b is within range of tile_a and no wall blocks the line between them."""
+        dr, dc = tile_b[0] - tile_a[0], tile_b[1] - tile_a[1]
+        reach = self.max_range
+        if not (-reach <= dr <= reach and -reach <= dc <= reach):
+            return False
+        row, col = tile_a
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return False
+        bit = self.offset_bit[dr + reach, dc + reach]
+        if bit < 0:
+            return False
+        return bool(self.bits[row * self.cols + col, bit >> 3] >> (7 - (bit & 7)) & 1)
+
+    def can_see_many(self, tiles, target):
+        """can_see(tile, target) for an (n, 2) array of tiles, as a boolean array."""
+        tiles = np.asarray(tiles, dtype=np.int64).reshape(-1, 2)
+        reach = self.max_range
+        dr = target[0] - tiles[:, 0]
+        dc = target[1] - tiles[:, 1]
+        valid = ((np.abs(dr) <= reach) & (np.abs(dc) <= reach)
+                 & (tiles[:, 0] >= 0) & (tiles[:, 0] < self.rows) & (tiles[:, 1] >= 0) & (tiles[:, 1] < self.cols))
+        bit = np.where(valid, self.offset_bit[np.clip(dr + reach, 0, 2 * reach), np.clip(dc + reach, 0, 2 * reach)], -1)
+        valid &= bit >= 0
+        index = np.where(valid, tiles[:, 0] * self.cols + tiles[:, 1], 0)
+        safe_bit = np.maximum(bit, 0)
+        return valid & ((self.bits[index, safe_bit >> 3] >> (7 - (safe_bit & 7))) & 1).astype(bool)
+
+    def visible_from(self, tile):
+        """Every (row, col) tile can see, e.g. for shadow-casting fog."""
+        row, col = tile
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return []
+        row_bits = np.unpackbits(self.bits[row * self.cols + col])
+        reach = self.max_range
+        offsets = np.argwhere(self.offset_bit >= 0)
+        bits = self.offset_bit[offsets[:, 0], offsets[:, 1]]
+        seen = offsets[row_bits[bits] == 1] - reach
+        return [(row + dr, col + dc) for dr, dc in seen.tolist()]
+
+class RayLineOfSight:
+    """LineOfSight answered by walking the ray when asked, for maps too large to precompute.
+
+    world is anything with rows, cols and is_solid(row, col), e.g. a ChunkedWorld, so only
+    the chunks a query crosses are loaded.
+    """
+
+    def __init__(self, world, max_range=LINE_OF_SIGHT_RANGE):
+        self.world = world
+        self.rows, self.cols = world.rows, world.cols
+        self.max_range = reach = max_range
+        self.rays = {(dr, dc): ray_tiles(dr, dc) for dr in range(-reach, reach + 1) for dc in range(-reach, reach + 1)
+                     if dr * dr + dc * dc <= reach * reach}
+
+    def can_see(self, tile_a, tile_b):
+        """True if tile_b is within range of tile_a and no wall blocks the line between them."""
+        ray = self.rays.get((tile_b[0] - tile_a[0], tile_b[1] - tile_a[1]))
+        if ray is None:
+            return False
+        (row, col), (end_row, end_col) = tile_a, tile_b
+        if not (0 <= row < self.rows and 0 <= col < self.cols and 0 <= end_row < self.rows and 0 <= end_col < self.cols):
+            return False
+        is_solid = self.world.is_solid
+        if is_solid(row, col) or is_solid(end_row, end_col):
+            return False
+        return not any(is_solid(row + dr, col + dc) for dr, dc in ray)
+
+    def can_see_many(self, tiles, target):
+        """can_see(tile, target) for an (n, 2) array of tiles, as a boolean array."""
+        tiles = np.asarray(tiles, dtype=np.int64).reshape(-1, 2)
+        return np.array([self.can_see((row, col), target) for row, col in tiles.tolist()], dtype=bool)
+
+    def visible_from(self, tile):
+        """Every (row, col) tile can see, e.g. for shadow-casting fog."""
+        row, col = tile
+        return [(row + dr, col + dc) for dr, dc in self.rays if self.can_see(tile, (row + dr, col + dc))]
@@ -1,242 +1,243 @@
+import time
+LAUNCH_TIME = time.perf_counter()  # Startup time is measured from here, before the imports
 import pygame
-import random
-import math
 import os
-import sys
-os.chdir(os.path.dirname(os.path.abspath(__file__)))
 from config import *
-from map_resources import load_map, create_map
-from game_objects import Player, Tracker
-from rendering import create_radial_gradient, update_darkness, draw_path, draw_radar
-
-pygame.init()
-
-def calculate_distance(pos1, pos2):
-    """Calculate Euclidean distance between two positions."""
-    return math.hypot(pos2[0] - pos1[0], pos2[1] - pos1[1])
-
-# Load map and initialize resources
-#map_layout = load_map("map/map1.txt")
-# Load all maps for levels
-LEVELS = [f"map/map{i + 1}.txt" for i in range(5)]
-current_level_index = 0
-
-def load_level(level_index):
-    """Load the map and initialize level resources."""
-    global walls, walkable_tiles, player, tracker, goal_tile
-    map_layout = load_map(LEVELS[level_index])
-    walls, walkable_tiles = create_map(map_layout)
-
-    # Locate goal tile (marked as 'G' in the map)
-    goal_tile = None
-    for row_idx, row in enumerate(map_layout):
-        for col_idx, tile in enumerate(row):
-            if tile == 'G':
-                goal_tile = (col_idx * TILE_SIZE + TILE_SIZE // 2, row_idx * TILE_SIZE + TILE_SIZE // 2)
+import tracing
+from assets import load_image, load_font, render_text
+from scenes import Scene, SceneManager
+from simulation import LEVELS, GameState, input_from_keys
+from level import LevelLoader
+from world import ChunkedWorld
+from warmup import Warmup
+from camera import Camera
+from replay import Recording
+from rendering import FogRenderer, draw_path, RadarRenderer, ProfilerOverlay
+from profiler import FrameProfiler
+
+GAME_IMAGES = ["assets/door.png", "assets/jumpscare1.png"]
+
+class GameScene(Scene):
+    """The levels themselves. Getting caught leads to game over, clearing the last level to complete_scene."""
+
+    caption = "Dynamic Tracker Behavior with Realistic Fog"
+    fps = FPS
+    music = "Deep Fan Noise (1 Minute).mp3"
+
+    def __init__(self, manager, complete_scene=None):
+        super().__init__(manager)
+        self.complete_scene = complete_scene  # Scene shown after the last level, or None to quit
+
+        # Per-phase frame timing, overlay toggled with F3
+        self.profiler = FrameProfiler()
+        self.profiler_overlay = ProfilerOverlay()
+        self.show_profiler = False
+        # The loader builds the next level and its background while this one is played
+        self.loader = LevelLoader(LEVELS, bake=True)
+        self.warmup = None
+        self.state = None  # Built on first enter, so the menu does not wait for level loading
+
+    def warm_up(self):
+        """Start loading the first level, images and music in the background, e.g. while a menu is shown."""
+        self.warmup = Warmup(GAME_IMAGES, [self.music], self.loader, on_ready=self.manager.mark_assets_ready)
+        return self.warmup
+
+    def enter(self):
+        if self.state is None:
+            if self.warmup is not None:
+                self.warmup.wait()  # Only blocks if Play was chosen before the warm-up finished
+            self.goal_image, self.jumpscare_image = (load_image(file_path) for file_path in GAME_IMAGES)
+            self.fog = FogRenderer()
+            self.radar = RadarRenderer(RADAR_CENTER, RADAR_RADIUS)
+            self.camera = Camera((WIDTH, HEIGHT))
+            self.state = GameState(profiler=self.profiler, loader=self.loader)
+            self.recording = Recording(self.state.seed, self.state.level_index, self.state.tracker_count)
+            self.manager.mark_assets_ready()  # Without a warm-up, loading ends here
+        else:
+            self.state.restart()  # Back to the first level, kept loaded by the loader
+        self.accumulator = 0  # Frame time not yet simulated, less than one step
+        self.show_level()
+
+    def show_level(self):
+        level = self.state.level
+        # Small levels are one baked surface, larger ones are streamed in chunks around the camera
+        self.background = level.background.convert() if level.background is not None else None
+        self.world = None
+        if self.background is None:
+            self.world = level.world if level.world is not None else ChunkedWorld.from_tile_map(level.tile_map)
+            self.world.bake = True  # Bake chunks as they load around the camera, ahead of drawing them
+        self.camera.set_world(level.size)
+        self.full_redraw = True  # The next frame repaints the whole window
+        self.overlay_rect = None  # Area the overlay covered last frame, repainted when it is hidden
+
+    def draw_map(self, screen, dirty_rect, area):
+        """Floor and walls of area, the map part shown in dirty_rect."""
+        if not self.camera.world_rect.contains(area):
+            screen.fill((0, 0, 0), dirty_rect)  # Window beyond the edge of the map
+        if self.background is not None:
+            screen.blit(self.background, dirty_rect, area)
+        else:
+            self.world.draw(screen, self.camera.rect, area)
+
+    def goal_screen_rect(self):
+        return self.camera.to_screen_rect(self.goal_image.get_rect(center=self.state.goal_tile))
+
+    def draw_goal_tile(self, screen):
+        """Draw the goal tile if it is in view."""
+        goal_rect = self.goal_screen_rect()
+        if goal_rect.colliderect(screen.get_rect()):
+            screen.blit(self.goal_image, goal_rect)
+
+    def frame(self, dt, events):
+        screen, state, profiler = self.manager.screen, self.state, self.profiler
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.show_profiler = not self.show_profiler
+
+        player_input = input_from_keys(pygame.key.get_pressed())
+        profiler.lap('input')
+
+        # Simulate in fixed steps, however long the frame took
+        self.accumulator += dt
+        outcome = None
+        for _ in range(MAX_STEPS_PER_FRAME):
+            if self.accumulator < STEP_DT or outcome is not None:
                 break
-
-    if not goal_tile:
-        raise ValueError("No goal ('G') found in the map.")
-
-    # Spawn player and tracker with minimum distance constraint
-    while True:
-        player_tile, tracker_tile = random.sample(walkable_tiles, 2)
-        player_pos = (player_tile[2], player_tile[3])
-        tracker_pos = (tracker_tile[2], tracker_tile[3])
-
-        # Ensure player and tracker are far enough apart
-        if calculate_distance(player_pos, tracker_pos) > TILE_SIZE * 8:
-            # Ensure player and goal are far enough apart
-            if calculate_distance(player_pos, goal_tile) > TILE_SIZE * 12:
-                break
-
-    # Initialize player and tracker
-    player = Player(player_tile[2], player_tile[3], RED, speed=150)
-    tracker = Tracker(tracker_tile[2], tracker_tile[3], BLUE, WANDER_SPEED, FOLLOW_SPEED, VISIBILITY_RADIUS)
-
-    return map_layout
-
-# Load goal tile image
-goal_image = pygame.image.load("assets/door.png")
-
-def draw_goal_tile():
-    """Draw the goal tile at its position."""
-    if goal_tile:
-        goal_rect = goal_image.get_rect(center=goal_tile)
-        screen.blit(goal_image, goal_rect)
-
-# Initialize first level
-map_layout = load_level(current_level_index)
-
-walls, walkable_tiles = create_map(map_layout)
-
-def game_over_screen():
-    """Display the Game Over screen and allow the user to restart or quit."""
-    font = pygame.font.Font(None, 74)
-    small_font = pygame.font.Font(None, 50)
-    screen.fill((0, 0, 0))
-
-    # Render text
-    text = font.render("Game Over", True, (255, 0, 0))
-    screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 3))
-
-    restart_text = small_font.render("Press R to Restart", True, (255, 255, 255))
-    screen.blit(restart_text, (WIDTH // 2 - restart_text.get_width() // 2, HEIGHT // 2))
-
-    quit_text = small_font.render("Press Q to Quit", True, (255, 255, 255))
-    screen.blit(quit_text, (WIDTH // 2 - quit_text.get_width() // 2, HEIGHT // 2 + 60))
-
-    pygame.display.flip()
-
-    # Wait for user input
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
+            self.recording.record(player_input)
+            outcome = state.step(STEP_DT, player_input)
+            self.accumulator -= STEP_DT
+        else:
+            self.accumulator = min(self.accumulator, STEP_DT)  # Too far behind, drop the rest of the stall
+        player = state.player
+
+        if outcome == 'caught':
+            tracing.dump(TRACE_DUMP_FILE)
+            self.recording.save(RECORDING_FILE)
+            screen.fill((0, 0, 0))  # Clear screen
+            screen.blit(self.jumpscare_image, (WIDTH // 2 - self.jumpscare_image.get_width() // 2, HEIGHT // 2 - self.jumpscare_image.get_height() // 2))
+            self.manager.switch('game_over')
+            return None
+        elif outcome == 'level_complete':
+            self.show_level()
+        elif outcome == 'game_complete':
+            tracing.channel('level').info("You completed all levels!")
+            if self.complete_scene is None:
+                self.manager.quit()
+            else:
+                self.manager.switch(self.complete_scene)
+            return []
+
+        # Draw everyone between the last two steps, by how far the frame is into the next one
+        player_center, tracker_centers = state.interpolated_positions(self.accumulator / STEP_DT)
+        player_rect = player.image.get_rect(center=player_center)
+
+        # Keep the player in view; the camera scrolls only on maps larger than the window
+        camera = self.camera
+        camera.follow(player_center)
+        if self.world is not None:
+            self.world.update(camera.rect)
+
+        # Update the fog effect
+        fog_rect = self.fog.update(camera.to_screen(player_center), state.time_factor)
+        profiler.lap('fog')
+
+        # Outside the fog window the screen stays black, so only the window, radar and goal change
+        goal_rect = self.goal_screen_rect().clip(screen.get_rect())
+        if self.full_redraw:
+            dirty_rects = [screen.get_rect()]
+            self.full_redraw = False
+        else:
+            dirty_rects = [fog_rect.union(self.previous_fog_rect), self.radar.rect, goal_rect]
+            if self.goal_rect != goal_rect:
+                dirty_rects.append(self.goal_rect)  # The camera scrolled, clear where the goal was
+            if self.overlay_rect:
+                dirty_rects.append(self.overlay_rect)
+        self.previous_fog_rect = fog_rect
+        self.goal_rect = goal_rect
+
+        # Rendering, of only what lies in each dirty rect
+        offset = camera.rect.topleft
+        for dirty_rect in dirty_rects:
+            screen.set_clip(dirty_rect)
+            area = camera.to_world_rect(dirty_rect)
+            self.draw_map(screen, dirty_rect, area)
+            if area.colliderect(player_rect):
+                screen.blit(player.image, camera.to_screen_rect(player_rect))
+            for tracker, tracker_center in zip(state.trackers, tracker_centers):
+                tracker_rect = tracker.image.get_rect(center=tracker_center)
+                if area.colliderect(tracker_rect):
+                    screen.blit(tracker.image, camera.to_screen_rect(tracker_rect))
+                draw_path(screen, tracker.path, offset, area)
+            self.fog.draw(screen)
+        screen.set_clip(None)
+        profiler.lap('render')
+
+        # Draw radar (after main elements)
+        self.radar.draw(screen, player_center, tracker_centers, state.sweep_angle)
+        profiler.lap('radar')
+
+        # Draw goal tile
+        self.draw_goal_tile(screen)
+
+        # Draw the profiler overlay last so it stays readable
+        self.overlay_rect = None
+        if self.show_profiler:
+            self.overlay_rect = self.profiler_overlay.draw(screen, profiler)
+            dirty_rects.append(self.overlay_rect)
+        profiler.lap('render')
+        return dirty_rects
+
+    def close(self):
+        if self.state is not None:
+            self.profiler.export(PROFILE_EXPORT_PATH)
+            self.recording.save(RECORDING_FILE)
+        if self.warmup is not None:
+            self.warmup.shutdown()
+        self.loader.shutdown()
+
+class GameOverScene(Scene):
+    """Game Over screen: R restarts from the first level, Q quits."""
+    music = GameScene.music  # Keep the fan noise going rather than cutting to silence
+
+    def enter(self):
+        self.drawn = False
+
+    def frame(self, dt, events):
+        for event in events:
+            if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:  # Restart the game
-                    return True
+                    self.manager.switch('game')
                 elif event.key == pygame.K_q:  # Quit the game
-                    pygame.quit()
-                    sys.exit()
-
-# Initialize player and tracker
-player_tile, tracker_tile = random.sample(walkable_tiles, 2)
-player = Player(player_tile[2], player_tile[3], RED, speed=150)
-tracker = Tracker(tracker_tile[2], tracker_tile[3], BLUE, WANDER_SPEED, FOLLOW_SPEED, VISIBILITY_RADIUS)
-
-# Screen setup
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Dynamic Tracker Behavior with Realistic Fog")
-clock = pygame.time.Clock()
-visibility_gradient = create_radial_gradient(VISIBILITY_RADIUS, 180)
-darkness = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-
-# Load jumpscare image
-jumpscare_image = pygame.image.load("assets/jumpscare1.png")
-
-# Load background sound
-pygame.mixer.init()
-pygame.mixer.music.load("Deep Fan Noise (1 Minute).mp3")
-pygame.mixer.music.play(-1)  # Loop background sound infinitely
-
-time_factor = 0  # Time factor for dynamic effects
-
-sweep_angle = 0
-
-running = True
-while running:
-    dt = clock.tick(FPS) / 1000
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    keys = pygame.key.get_pressed()
-
-    # Determine player's movement speed and adjust DISTANCE_THRESHOLD
-    if keys[pygame.K_c]:  # Sneak mode
-        current_speed = SNEAK_SPEED
-        current_distance_threshold = DISTANCE_THRESHOLD * 0.5  # Reduced threshold for sneaking
-    elif keys[pygame.K_SPACE]:  # Sprint mode
-        current_speed = RUN_SPEED
-        current_distance_threshold = DISTANCE_THRESHOLD * 2.5  # Increased threshold for sprinting
-    else:  # Normal mode
-        current_speed = player.speed
-        current_distance_threshold = DISTANCE_THRESHOLD  # Default threshold
-
-    # Adjust distance calculations based on new threshold
-    dx, dy = 0, 0
-    if keys[pygame.K_w]: dy = -1
-    if keys[pygame.K_s]: dy = 1
-    if keys[pygame.K_a]: dx = -1
-    if keys[pygame.K_d]: dx = 1
-
-    # Normalize diagonal movement
-    if dx != 0 and dy != 0:
-        dx *= math.sqrt(0.5)
-        dy *= math.sqrt(0.5)
-
-    # Update player's position
-    new_player_x = player.rect.x + dx * current_speed * dt
-    new_player_y = player.rect.y + dy * current_speed * dt
-
-    new_player_rect_x = player.rect.copy()
-    new_player_rect_x.x = new_player_x
-
-    new_player_rect_y = player.rect.copy()
-    new_player_rect_y.y = new_player_y
-
-    collision_x = any(wall.rect.colliderect(new_player_rect_x) for wall in walls)
-    collision_y = any(wall.rect.colliderect(new_player_rect_y) for wall in walls)
-
-    if not collision_x:
-        player.rect.x = new_player_x
-    if not collision_y:
-        player.rect.y = new_player_y
-
-    # Update sweep angle
-    sweep_angle = (sweep_angle + SWEEP_SPEED * dt) % 360  # Rotate 1 degree per frame
-
-    # Tracker logic based on adjusted DISTANCE_THRESHOLD
-    distance = math.hypot(player.rect.centerx - tracker.rect.centerx, player.rect.centery - tracker.rect.centery)
-    if distance > current_distance_threshold and tracker.state != 'wander':
-        tracker.state = 'wander'
-        tracker.speed = tracker.wander_speed
-        tracker.initialize_tracker_target('wander', map_layout, walkable_tiles, player)
-    elif distance <= current_distance_threshold and tracker.state != 'follow':
-        tracker.state = 'follow'
-        tracker.speed = tracker.follow_speed
-        tracker.initialize_tracker_target('follow', map_layout, walkable_tiles, player)
-    tracker.update(dt, player, map_layout, walkable_tiles)
-
-    # Check for collision between player and tracker
-    if pygame.sprite.collide_rect(player, tracker):
-        screen.fill((0, 0, 0))  # Clear screen
-        screen.blit(jumpscare_image, (WIDTH // 2 - jumpscare_image.get_width() // 2, HEIGHT // 2 - jumpscare_image.get_height() // 2))
-        game_over = game_over_screen()  # Display Game Over screen
-        if game_over:
-            current_level_index = 0  # Reset to the first level
-            map_layout = load_level(current_level_index)  # Reload the first level
-            player.rect.topleft = (walkable_tiles[0][2], walkable_tiles[0][3])  # Reset player position
-            tracker.rect.topleft = (walkable_tiles[1][2], walkable_tiles[1][3])  # Reset tracker position
-
-    # Check for level transition
-    player_tile = (player.rect.centery // TILE_SIZE, player.rect.centerx // TILE_SIZE)
-    for row_idx, row in enumerate(map_layout):
-        for col_idx, tile in enumerate(row):
-            if tile == 'G' and player_tile == (row_idx, col_idx):
-                current_level_index += 1
-                if current_level_index < len(LEVELS):
-                    map_layout = load_level(current_level_index)
-                else:
-                    print("You completed all levels!")
-                    running = False
-
-    # Rendering
-    screen.fill(WHITE)
-    walls.draw(screen)
-    screen.blit(player.image, player.rect)
-    screen.blit(tracker.image, tracker.rect)
-    draw_path(tracker.path)
-
-    # In your game loop
-    time_factor += dt  # Increment time factor
-
-    # Generate the dynamic visibility gradient
-    visibility_gradient = create_radial_gradient(VISIBILITY_RADIUS, time_factor)
-
-    # Update the fog effect
-    update_darkness(player.rect.center, visibility_gradient, darkness, time_factor)
-    screen.blit(darkness, (0, 0))
-
-    # Draw radar (after main elements)
-    draw_radar(screen, player.rect.center, tracker.rect.center, RADAR_CENTER, RADAR_RADIUS, sweep_angle)
-
-    # Draw goal tile
-    draw_goal_tile()
-
-    pygame.display.flip()
-
-pygame.quit()
+                    self.manager.quit()
+
+        # The screen never changes, so it is drawn once per visit
+        if self.drawn:
+            return []
+        self.drawn = True
+        screen = self.manager.screen
+        font = load_font(None, 74)
+        small_font = load_font(None, 50)
+        screen.fill((0, 0, 0))
+
+        # Render text
+        text = render_text(font, "Game Over", (255, 0, 0))
+        screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 3))
+
+        restart_text = render_text(small_font, "Press R to Restart", (255, 255, 255))
+        screen.blit(restart_text, (WIDTH // 2 - restart_text.get_width() // 2, HEIGHT // 2))
+
+        quit_text = render_text(small_font, "Press Q to Quit", (255, 255, 255))
+        screen.blit(quit_text, (WIDTH // 2 - quit_text.get_width() // 2, HEIGHT // 2 + 60))
+        return None
+
+def add_game_scenes(manager, complete_scene=None):
+    manager.add('game', GameScene, complete_scene)
+    manager.add('game_over', GameOverScene)
+
+if __name__ == "__main__":
+    # Straight into the first level, without the menu
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    tracing.install_crash_dump(TRACE_DUMP_FILE)
+    manager = SceneManager(LAUNCH_TIME)
+    add_game_scenes(manager)
+    manager.run('game')
@@ -0,0 +1,119 @@
+# map_generator.py
+import random
+
+def carve_maze(rows, cols, rng):
+    """Corridor layout: a perfect maze carved on the odd cells of a walled grid."""
+    grid = [['W'] * cols for _ in range(rows)]
+    start = (1, 1)
+    grid[1][1] = ' '
+    stack = [start]
+    while stack:
+        row, col = stack[-1]
+        neighbours = [(row + dr, col + dc, row + dr // 2, col + dc // 2)
+                      for dr, dc in ((-2, 0), (2, 0), (0, -2), (0, 2))
+                      if 0 < row + dr < rows - 1 and 0 < col + dc < cols - 1
+                      and grid[row + dr][col + dc] == 'W']
+        if not neighbours:
+            stack.pop()
+            continue
+        next_row, next_col, wall_row, wall_col = rng.choice(neighbours)
+        grid[wall_row][wall_col] = ' '
+        grid[next_row][next_col] = ' '
+        stack.append((next_row, next_col))
+    return grid
+
+def generate_map(rows, cols, wall_density=0.3, corridors=True, seed=0):
+    """Build a synthetic map in the same format load_map returns.
+
+    With corridors the map starts as a maze and random interior walls are knocked out
+    until at most wall_density of the interior is wall, otherwise walls are scattered
+    uniformly at that density. The border is always wall and one floor tile becomes 'G'.
+    """
+    rng = random.Random(seed)
+    interior = [(row, col) for row in range(1, rows - 1) for col in range(1, cols - 1)]
+    if corridors:
+        grid = carve_maze(rows, cols, rng)
+        walls = [tile for tile in interior if grid[tile[0]][tile[1]] == 'W']
+        rng.shuffle(walls)
+        excess = len(walls) - int(len(interior) * wall_density)
+        for row, col in walls[:max(excess, 0)]:
+            grid[row][col] = ' '
+    else:
+        grid = [['W'] * cols for _ in range(rows)]
+        for row, col in interior:
+            if rng.random() >= wall_density:
+                grid[row][col] = ' '
+
+    floor = [tile for tile in interior if grid[tile[0]][tile[1]] == ' ']
+    if floor:
+        goal_row, goal_col = rng.choice(floor)
+        grid[goal_row][goal_col] = 'G'
+    return [''.join(row) for row in grid]
+
+def door_offset(seed, kind, chunk_row, chunk_col, chunk_size):
+    """Position along a chunk edge of the door through it, the same for the chunks on both sides.
+
+    kind 'east' is the edge between (chunk_row, chunk_col) and the chunk to its right,
+    'south' the edge between it and the chunk below.
+    """
+    return random.Random(f"{seed}:{kind}:{chunk_row}:{chunk_col}").randrange(1, chunk_size - 1)
+
+def carve_line(grid, start, end, vertical_first=True):
+    """Floor along a vertical then horizontal line between two tiles, or the other way round."""
+    (row, col), (end_row, end_col) = start, end
+    corner = (end_row, col) if vertical_first else (row, end_col)
+    for (from_row, from_col), (to_row, to_col) in ((start, corner), (corner, end)):
+        row_step = 1 if to_row >= from_row else -1
+        col_step = 1 if to_col >= from_col else -1
+        for r in range(from_row, to_row + row_step, row_step):
+            for c in range(from_col, to_col + col_step, col_step):
+                grid[r][c] = ' '
+
+def generate_chunk(chunk_row, chunk_col, chunk_rows, chunk_cols, chunk_size, seed=0):
+    """One chunk of a ship map: a room or a corridor junction, linked through a door on every inner edge.
+
+    Each chunk depends only on the seed and its own position, so any chunk can be built on its
+    own and it still lines up with its neighbours. Rooms and corridors never touch the chunk
+    border except at doors, so the whole map is walled in and every floor tile is connected.
+    """
+    rng = random.Random(f"{seed}:chunk:{chunk_row}:{chunk_col}")
+    grid = [['W'] * chunk_size for _ in range(chunk_size)]
+    inner = chunk_size - 2
+    if rng.random() < 0.75:
+        height = rng.randint(min(3, inner), inner)
+        width = rng.randint(min(3, inner), inner)
+        top, left = rng.randint(1, chunk_size - 1 - height), rng.randint(1, chunk_size - 1 - width)
+        for row in range(top, top + height):
+            grid[row][left:left + width] = [' '] * width
+        center = (top + height // 2, left + width // 2)
+    else:
+        center = (rng.randint(1, inner), rng.randint(1, inner))
+        grid[center[0]][center[1]] = ' '
+
+    # The last leg of each corridor runs straight into its door, so only the door tile is on the border
+    last = chunk_size - 1
+    if chunk_row > 0:
+        carve_line(grid, center, (0, door_offset(seed, 'south', chunk_row - 1, chunk_col, chunk_size)), False)
+    if chunk_row < chunk_rows - 1:
+        carve_line(grid, center, (last, door_offset(seed, 'south', chunk_row, chunk_col, chunk_size)), False)
+    if chunk_col > 0:
+        carve_line(grid, center, (door_offset(seed, 'east', chunk_row, chunk_col - 1, chunk_size), 0))
+    if chunk_col < chunk_cols - 1:
+        carve_line(grid, center, (door_offset(seed, 'east', chunk_row, chunk_col, chunk_size), last))
+
+    # The goal sits in the chunk farthest from the first one
+    if (chunk_row, chunk_col) == (chunk_rows - 1, chunk_cols - 1):
+        grid[center[0]][center[1]] = 'G'
+    return [''.join(row) for row in grid]
+
+def generate_ship(chunk_rows, chunk_cols, chunk_size, seed=0):
+    """Whole ship map from generate_chunk, in the same format load_map returns.
+
+    Meant for tests and small maps; large ones are streamed chunk by chunk instead.
+    """
+    layout = []
+    for chunk_row in range(chunk_rows):
+        chunks = [generate_chunk(chunk_row, chunk_col, chunk_rows, chunk_cols, chunk_size, seed)
+                  for chunk_col in range(chunk_cols)]
+        layout.extend(''.join(rows) for rows in zip(*chunks))
+    return layout
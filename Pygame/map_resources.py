@@ -16,12 +16,15 @@ def load_map(file_path):
     with open(absolute_path, 'r') as f:
         return [line.strip() for line in f.readlines()]
 
-def create_map(map_layout):
-    """Generate wall sprites and collect walkable tiles."""
+def create_map(map_layout, origin=(0, 0)):
+    """Generate wall sprites and collect walkable tiles.
+
+    origin is the (row, col) of the layout's first tile, for chunks of a larger map.
+    """
     walls = pygame.sprite.Group()
     walkable_tiles = []
-    for row_idx, row in enumerate(map_layout):
-        for col_idx, tile in enumerate(row):
+    for row_idx, row in enumerate(map_layout, origin[0]):
+        for col_idx, tile in enumerate(row, origin[1]):
             if tile == 'W':
                 walls.add(Wall(col_idx * TILE_SIZE, row_idx * TILE_SIZE))
             elif tile == ' ':
@@ -0,0 +1,88 @@
+# path_cache.py
+from collections import OrderedDict
+from config import PATH_CACHE_MAX_TILES
+import tracing
+
+trace = tracing.channel('pathfinding')
+
+class PathCache:
+    """Least recently used paths in front of a search, keyed by (map version, start, goal).
+
+    A query whose start lies on a cached path to the same goal is answered with the rest of
+    that path: any suffix of a path is a valid path, though not always the shortest one since
+    the search itself is only near-optimal. Memory is bounded by the number of tiles held
+    across all paths. invalidate() drops everything, e.g. when a door opens or a wall breaks.
+    """
+
+    def __init__(self, search, max_tiles=PATH_CACHE_MAX_TILES):
+        self.search = search  # search(start, goal) -> path in the format bfs returns
+        self.max_tiles = max_tiles
+        self.version = 0
+        self.paths = OrderedDict()  # (version, start, goal) -> path, least recently used first
+        self.suffixes = {}  # (version, goal) -> {tile: (key of a cached path through it, position)}
+        self.tiles = 0
+        self.hits = 0
+        self.suffix_hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """The map changed: cached paths may cross new walls or miss new openings."""
+        self.version += 1
+        self.paths.clear()
+        self.suffixes.clear()
+        self.tiles = 0
+        trace.debug("Path cache invalidated, map version %d", self.version)
+
+    def path(self, start, goal):
+        """A path from start to goal as search finds them, from the cache when possible."""
+        key = (self.version, start, goal)
+        path = self.paths.get(key)
+        if path is not None:
+            self.paths.move_to_end(key)
+            self.hits += 1
+            return list(path)
+
+        through = self.suffixes.get((self.version, goal))
+        if through is not None and start in through:
+            source_key, position = through[start]
+            self.paths.move_to_end(source_key)
+            self.suffix_hits += 1
+            return list(self.paths[source_key][position:])
+
+        self.misses += 1
+        path = self.search(start, goal)
+        if path:
+            self._store(key, path)
+        return path
+
+    def _store(self, key, path):
+        if len(path) > self.max_tiles:
+            return
+        self.paths[key] = tuple(path)
+        through = self.suffixes.setdefault((key[0], key[2]), {})
+        for position, tile in enumerate(path):
+            if tile not in through:
+                through[tile] = (key, position)
+        self.tiles += len(path)
+        while self.tiles > self.max_tiles:
+            self._evict()
+
+    def _evict(self):
+        key, path = self.paths.popitem(last=False)
+        self.tiles -= len(path)
+        suffix_key = (key[0], key[2])
+        through = self.suffixes[suffix_key]
+        for tile in path:
+            if through.get(tile, (None,))[0] == key:
+                del through[tile]
+        if not through:
+            del self.suffixes[suffix_key]
+
+    @property
+    def hit_rate(self):
+        queries = self.hits + self.suffix_hits + self.misses
+        return (self.hits + self.suffix_hits) / queries if queries else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "suffix_hits": self.suffix_hits, "misses": self.misses,
+                "paths": len(self.paths), "tiles": self.tiles, "version": self.version}
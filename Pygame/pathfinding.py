@@ -0,0 +1,213 @@
+# pathfinding.py
+import heapq
+from collections import deque
+from config import HPA_CLUSTER_SIZE
+import tracing
+
+trace = tracing.channel('pathfinding')
+
+ENTRANCE_SPLIT = 6  # Border openings at least this wide get an entrance at each end instead of one
+
+def astar(walkable, rows, cols, start, goal, bounds=None):
+    """A* with a Manhattan heuristic over a row-major walkable mask, in the same format bfs returns.
+
+    bounds = (top, left, bottom, right) keeps the search inside that rectangle, bottom and right excluded.
+    """
+    if start == goal:
+        return [start]
+    top, left, bottom, right = bounds if bounds is not None else (0, 0, rows, cols)
+    goal_row, goal_col = goal
+    if not (top <= goal_row < bottom and left <= goal_col < right) or not walkable[goal_row * cols + goal_col]:
+        return []
+    start_index, goal_index = start[0] * cols + start[1], goal_row * cols + goal_col
+    cost = {start_index: 0}
+    parent = {start_index: None}
+    heuristic = abs(start[0] - goal_row) + abs(start[1] - goal_col)
+    heap = [(heuristic, heuristic, start_index)]  # Ties go to the node closer to the goal
+    while heap:
+        _, _, current = heapq.heappop(heap)
+        if current == goal_index:
+            path = []
+            while current is not None:
+                path.append(divmod(current, cols))
+                current = parent[current]
+            return path[::-1]
+        next_cost = cost[current] + 1
+        row, col = divmod(current, cols)
+        for next_row, next_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if top <= next_row < bottom and left <= next_col < right:
+                neighbour = next_row * cols + next_col
+                if walkable[neighbour] and next_cost < cost.get(neighbour, next_cost + 1):
+                    cost[neighbour] = next_cost
+                    parent[neighbour] = current
+                    heuristic = abs(next_row - goal_row) + abs(next_col - goal_col)
+                    heapq.heappush(heap, (next_cost + heuristic, heuristic, neighbour))
+    return []
+
+def remove_loops(path):
+    """Cut out every stretch of path that comes back to a tile it already visited."""
+    position = {}
+    result = []
+    for tile in path:
+        if tile in position:
+            for removed in result[position[tile] + 1:]:
+                del position[removed]
+            del result[position[tile] + 1:]
+        else:
+            position[tile] = len(result)
+            result.append(tile)
+    return result
+
+class HierarchicalPathfinder:
+    """HPA*: the map cut into square clusters, linked through entrances on their borders.
+
+    At load every cluster gets the shortest paths between its own entrances. A query only
+    searches the start and goal clusters on the tile grid and the entrance graph in between,
+    so its cost follows the length of the path rather than the size of the map. Paths are
+    close to, but not always exactly, the shortest.
+    """
+
+    def __init__(self, tile_map, cluster_size=HPA_CLUSTER_SIZE):
+        self.rows, self.cols = tile_map.rows, tile_map.cols
+        self.walkable = tile_map.mask(" ")  # Row-major, 1 for floor tiles
+        self.cluster_size = cluster_size
+        self.edges = {}  # Entrance tile -> {entrance tile: (cost, path from one to the other)}
+        self.cluster_entrances = {}  # Cluster (row, col) -> entrance tiles inside it
+        self._build_entrances()
+        for cluster, entrances in self.cluster_entrances.items():
+            self._link_cluster(cluster, entrances)
+        trace.debug("HPA*: %d clusters, %d entrances", len(self.cluster_entrances), len(self.edges))
+
+    def is_walkable(self, tile):
+        row, col = tile
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.walkable[row * self.cols + col] == 1
+
+    def cluster_of(self, tile):
+        return (tile[0] // self.cluster_size, tile[1] // self.cluster_size)
+
+    def cluster_bounds(self, cluster):
+        top, left = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return (top, left, min(top + self.cluster_size, self.rows), min(left + self.cluster_size, self.cols))
+
+    def _add_entrance(self, inside, outside):
+        """Entrance pair straddling a cluster border, one step apart."""
+        for tile, other in ((inside, outside), (outside, inside)):
+            self.edges.setdefault(tile, {})[other] = (1, [tile, other])
+            entrances = self.cluster_entrances.setdefault(self.cluster_of(tile), [])
+            if tile not in entrances:
+                entrances.append(tile)
+
+    def _build_entrances(self):
+        size = self.cluster_size
+        # Each border is scanned along its length for runs of floor on both sides
+        borders = [((row, col - 1), (row, col), (1, 0), self.rows)
+                   for col in range(size, self.cols, size) for row in range(0, self.rows, size)]
+        borders += [((row - 1, col), (row, col), (0, 1), self.cols)
+                    for row in range(size, self.rows, size) for col in range(0, self.cols, size)]
+        for first_a, first_b, step, limit in borders:
+            run = []
+            length = min(size, limit - (first_a[0] if step[0] else first_a[1]))
+            for i in range(length + 1):
+                a = (first_a[0] + step[0] * i, first_a[1] + step[1] * i)
+                b = (first_b[0] + step[0] * i, first_b[1] + step[1] * i)
+                if i < length and self.is_walkable(a) and self.is_walkable(b):
+                    run.append((a, b))
+                    continue
+                if run:
+                    if len(run) >= ENTRANCE_SPLIT:
+                        self._add_entrance(*run[0])
+                        self._add_entrance(*run[-1])
+                    else:
+                        self._add_entrance(*run[len(run) // 2])
+                    run = []
+
+    def _cluster_paths(self, source, bounds, targets):
+        """Shortest paths inside bounds from source to each reachable target, by BFS."""
+        top, left, bottom, right = bounds
+        parent = {source: None}
+        queue = deque([source])
+        while queue:
+            row, col = queue.popleft()
+            for neighbour in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if (top <= neighbour[0] < bottom and left <= neighbour[1] < right
+                        and neighbour not in parent and self.walkable[neighbour[0] * self.cols + neighbour[1]]):
+                    parent[neighbour] = (row, col)
+                    queue.append(neighbour)
+        paths = {}
+        for target in targets:
+            if target in parent:
+                path, current = [], target
+                while current is not None:
+                    path.append(current)
+                    current = parent[current]
+                paths[target] = path[::-1]
+        return paths
+
+    def _link_cluster(self, cluster, entrances):
+        bounds = self.cluster_bounds(cluster)
+        for i, entrance in enumerate(entrances):
+            # Paths are reversible, so each pair is searched once
+            for other, path in self._cluster_paths(entrance, bounds, entrances[i + 1:]).items():
+                self.edges[entrance][other] = (len(path) - 1, path)
+                self.edges[other][entrance] = (len(path) - 1, path[::-1])
+
+    def path(self, start, goal):
+        """Path from start to goal in the same format bfs returns, or [] if there is none."""
+        if start == goal:
+            return [start]
+        if not self.is_walkable(goal):
+            return []
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+        if start_cluster == goal_cluster:
+            local = astar(self.walkable, self.rows, self.cols, start, goal, self.cluster_bounds(start_cluster))
+            if local:
+                return local
+
+        # Hook start and goal onto the entrances of their clusters
+        start_links = self._cluster_paths(start, self.cluster_bounds(start_cluster),
+                                          self.cluster_entrances.get(start_cluster, []))
+        goal_links = self._cluster_paths(goal, self.cluster_bounds(goal_cluster),
+                                         self.cluster_entrances.get(goal_cluster, []))
+        if not start_links or not goal_links:
+            return []
+
+        # A* over the entrance graph; the goal is reached through any of its cluster's entrances
+        cost = {}
+        parent = {}
+        heap = []
+        for entrance, link in start_links.items():
+            cost[entrance] = len(link) - 1
+            parent[entrance] = None
+            heuristic = abs(entrance[0] - goal[0]) + abs(entrance[1] - goal[1])
+            heapq.heappush(heap, (cost[entrance] + heuristic, heuristic, entrance))
+        best_cost, best_exit = None, None
+        while heap:
+            estimate, _, current = heapq.heappop(heap)
+            if best_cost is not None and estimate >= best_cost:
+                break
+            if current in goal_links:
+                total = cost[current] + len(goal_links[current]) - 1
+                if best_cost is None or total < best_cost:
+                    best_cost, best_exit = total, current
+            for neighbour, (step_cost, _) in self.edges.get(current, {}).items():
+                next_cost = cost[current] + step_cost
+                if next_cost < cost.get(neighbour, next_cost + 1):
+                    cost[neighbour] = next_cost
+                    parent[neighbour] = current
+                    heuristic = abs(neighbour[0] - goal[0]) + abs(neighbour[1] - goal[1])
+                    heapq.heappush(heap, (next_cost + heuristic, heuristic, neighbour))
+        if best_exit is None:
+            return []
+
+        # Refine: stitch the stored tile paths of every abstract step together
+        entrances = []
+        current = best_exit
+        while current is not None:
+            entrances.append(current)
+            current = parent[current]
+        entrances.reverse()
+        path = list(start_links[entrances[0]])
+        for previous, entrance in zip(entrances, entrances[1:]):
+            path.extend(self.edges[previous][entrance][1][1:])
+        path.extend(goal_links[best_exit][::-1][1:])
+        return remove_loops(path)  # Entrance hops can double back on themselves
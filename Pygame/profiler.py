@@ -0,0 +1,85 @@
+# profiler.py
+import csv
+import json
+from collections import deque
+from time import perf_counter_ns
+from config import PROFILE_WINDOW, PROFILE_BIN_US, PROFILE_BINS
+
+class FrameProfiler:
+    """Times named phases of each frame, with rolling percentiles and whole-session histograms."""
+
+    def __init__(self, enabled=True, window=PROFILE_WINDOW, bin_us=PROFILE_BIN_US, bins=PROFILE_BINS):
+        self.enabled = enabled
+        self.window = window
+        self.bin_ns = bin_us * 1000
+        self.bins = bins
+        self.phases = []  # Phase names in first-seen order
+        self.samples = {}  # Phase -> last `window` frame times in ns
+        self.histograms = {}  # Phase -> counts per bin, last bin collects everything slower
+        self.current = {}  # Phase -> time spent so far in this frame
+        self.frame_start = None
+        self.last = None
+
+    def begin_frame(self):
+        """Close the previous frame and start timing a new one."""
+        if not self.enabled:
+            return
+        now = perf_counter_ns()
+        if self.frame_start is not None:
+            self.current['frame'] = now - self.frame_start
+            for phase, elapsed in self.current.items():
+                self._record(phase, elapsed)
+        self.current = {}
+        self.frame_start = self.last = now
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to phase."""
+        if not self.enabled or self.last is None:
+            return
+        now = perf_counter_ns()
+        self.current[phase] = self.current.get(phase, 0) + now - self.last
+        self.last = now
+
+    def _record(self, phase, elapsed):
+        if phase not in self.samples:
+            self.phases.append(phase)
+            self.samples[phase] = deque(maxlen=self.window)
+            self.histograms[phase] = [0] * self.bins
+        self.samples[phase].append(elapsed)
+        self.histograms[phase][min(elapsed // self.bin_ns, self.bins - 1)] += 1
+
+    def percentiles(self, phase, points=(50, 95, 99)):
+        """Rolling percentiles of phase in milliseconds."""
+        ordered = sorted(self.samples.get(phase, ()))
+        if not ordered:
+            return tuple(0.0 for _ in points)
+        return tuple(ordered[min(len(ordered) * point // 100, len(ordered) - 1)] / 1e6 for point in points)
+
+    def summary(self):
+        """(phase, p50, p95, p99) rows, slowest p95 first after the whole frame."""
+        rows = [(phase,) + self.percentiles(phase) for phase in self.phases]
+        return sorted(rows, key=lambda row: (row[0] != 'frame', -row[2]))
+
+    def export(self, base_path):
+        """Write the histograms to base_path.json and base_path.csv."""
+        bin_ms = self.bin_ns / 1e6
+        report = {
+            "bin_ms": bin_ms,
+            "phases": {
+                phase: {
+                    "frames": sum(self.histograms[phase]),
+                    "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                    "histogram": self.histograms[phase],
+                }
+                for phase, p50, p95, p99 in self.summary()
+            },
+        }
+        with open(base_path + ".json", "w") as f:
+            json.dump(report, f, indent=2)
+        with open(base_path + ".csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["phase", "bin_start_ms", "frames"])
+            for phase in self.phases:
+                for index, count in enumerate(self.histograms[phase]):
+                    if count:
+                        writer.writerow([phase, round(index * bin_ms, 3), count])
@@ -0,0 +1,221 @@
+# reachability.py
+import math
+import random
+from array import array
+from collections import deque
+import numpy as np
+from config import TILE_SIZE, MIN_TARGET_DISTANCE, DISTANCE_TABLE_MAX_TILES, LOCAL_WANDER_RANGE
+from game_logic import bfs
+from pathfinding import astar
+from flow_field import FlowField
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+NO_PATH = 0xFFFF  # Marker for unreachable pairs in the distance table
+
+def draw_skipping(rng, count, excluded):
+    """Uniform draw from range(count) that never returns a position in excluded, a sorted list.
+
+    One draw among the remaining positions, mapped back by skipping the excluded ones, so it
+    never retries. Returns None if every position is excluded.
+    """
+    if count - len(excluded) <= 0:
+        return None
+    pick = rng.randrange(count - len(excluded))
+    for position in excluded:
+        if pick >= position:
+            pick += 1
+    return pick
+
+class Reachability:
+    """Per-level connected components and tile-to-tile path lengths, built once at load."""
+
+    def __init__(self, map_layout, walkable_tiles, max_table_tiles=DISTANCE_TABLE_MAX_TILES, pathfinder=None):
+        self.map_layout = map_layout
+        self.pathfinder = pathfinder  # Anything with path(start, goal), for maps too large for the table
+        self.tiles = [(tile[0], tile[1]) for tile in walkable_tiles]
+        self.index = {tile: i for i, tile in enumerate(self.tiles)}
+        self.neighbours = [
+            [self.index[(row + d[0], col + d[1])] for d in DIRECTIONS
+             if (row + d[0], col + d[1]) in self.index]
+            for row, col in self.tiles
+        ]
+        self._build_components()
+        # The table is quadratic in the number of tiles, so very large maps skip it
+        self.table = None
+        if len(self.tiles) <= max_table_tiles:
+            self._build_table()
+
+    def _build_components(self):
+        count = len(self.tiles)
+        self.component_of = array('i', [-1]) * count
+        self.components = []  # Tile indices of each component
+        self.member_pos = array('i', [0]) * count  # Position of a tile inside its component list
+        for start in range(count):
+            if self.component_of[start] != -1:
+                continue
+            label = len(self.components)
+            members = [start]
+            self.component_of[start] = label
+            queue = deque([start])
+            while queue:
+                current = queue.popleft()
+                for neighbour in self.neighbours[current]:
+                    if self.component_of[neighbour] == -1:
+                        self.component_of[neighbour] = label
+                        members.append(neighbour)
+                        queue.append(neighbour)
+            for pos, member in enumerate(members):
+                self.member_pos[member] = pos
+            self.components.append(members)
+
+    def _build_table(self):
+        count = len(self.tiles)
+        table = array('H', [NO_PATH]) * (count * count)
+        for source in range(count):
+            base = source * count
+            table[base + source] = 0
+            queue = deque([source])
+            while queue:
+                current = queue.popleft()
+                next_distance = table[base + current] + 1
+                for neighbour in self.neighbours[current]:
+                    if table[base + neighbour] == NO_PATH:
+                        table[base + neighbour] = next_distance
+                        queue.append(neighbour)
+        self.table = table
+
+    def same_component(self, start, goal):
+        if start not in self.index or goal not in self.index:
+            return False
+        return self.component_of[self.index[start]] == self.component_of[self.index[goal]]
+
+    def reaching(self, tile):
+        """Row-major boolean grid of the floor tiles connected to tile or to a floor tile beside it."""
+        cols = len(self.map_layout[0]) if self.map_layout else 0
+        labels = {self.component_of[self.index[(tile[0] + dr, tile[1] + dc)]]
+                  for dr, dc in [(0, 0)] + DIRECTIONS if (tile[0] + dr, tile[1] + dc) in self.index}
+        mask = np.zeros(len(self.map_layout) * cols, dtype=bool)
+        for label in labels:
+            for member in self.components[label]:
+                row, col = self.tiles[member]
+                mask[row * cols + col] = True
+        return mask
+
+    def _search(self, start, goal):
+        if self.pathfinder is not None:
+            return self.pathfinder.path(start, goal)
+        return bfs(self.map_layout, start, goal)
+
+    def distance(self, start, goal):
+        """Number of steps along path(start, goal), or -1 if goal cannot be reached."""
+        if not self.same_component(start, goal):
+            return -1
+        if self.table is None:
+            return len(self._search(start, goal)) - 1
+        return self.table[self.index[start] * len(self.tiles) + self.index[goal]]
+
+    def path(self, start, goal):
+        """Path from start to goal in the same format bfs returns.
+
+        Shortest when the distance table was built; otherwise whatever the pathfinder returns,
+        which for HPA* may be a few steps longer.
+        """
+        if not self.same_component(start, goal):
+            return []
+        if self.table is None:
+            return self._search(start, goal)
+
+        count = len(self.tiles)
+        goal_index = self.index[goal]
+        current = self.index[start]
+        path = [start]
+        while current != goal_index:
+            remaining = self.table[current * count + goal_index]
+            for neighbour in self.neighbours[current]:
+                if self.table[neighbour * count + goal_index] == remaining - 1:
+                    current = neighbour
+                    break
+            path.append(self.tiles[current])
+        return path
+
+    def pick_wander_target(self, current_tile, position, previous_tile=None, rng=random):
+        """Draw a reachable tile far enough from position, or None if no tile qualifies."""
+        if current_tile not in self.index:
+            return None
+        label = self.component_of[self.index[current_tile]]
+        members = self.components[label]
+
+        # Only tiles around the tracker can be closer than MIN_TARGET_DISTANCE
+        excluded = set()
+        reach = MIN_TARGET_DISTANCE // TILE_SIZE + 1
+        for row in range(current_tile[0] - reach, current_tile[0] + reach + 1):
+            for col in range(current_tile[1] - reach, current_tile[1] + reach + 1):
+                tile_index = self.index.get((row, col))
+                if tile_index is None or self.component_of[tile_index] != label:
+                    continue
+                center_x = col * TILE_SIZE + TILE_SIZE // 2
+                center_y = row * TILE_SIZE + TILE_SIZE // 2
+                if ((row, col) == current_tile or
+                        math.hypot(center_x - position[0], center_y - position[1]) < MIN_TARGET_DISTANCE):
+                    excluded.add(self.member_pos[tile_index])
+        if previous_tile is not None and self.same_component(current_tile, previous_tile):
+            excluded.add(self.member_pos[self.index[previous_tile]])
+
+        pick = draw_skipping(rng, len(members), sorted(excluded))
+        return None if pick is None else self.tiles[members[pick]]
+
+class LocalReachability:
+    """Reachability for streamed maps, answered around the tracker instead of across the map.
+
+    Nothing is built per tile beyond the walkable mask. Wander targets are drawn within
+    max_range tiles of the tracker and paths are searched by A* in a window around both ends,
+    so a query costs the same on any map size; a target the window cannot reach has no path.
+    """
+
+    def __init__(self, tile_map, max_range=LOCAL_WANDER_RANGE):
+        self.tile_map = tile_map
+        self.rows, self.cols = tile_map.rows, tile_map.cols
+        self.walkable = tile_map.mask(" ")  # Row-major, 1 for floor tiles
+        self.floor = np.frombuffer(self.walkable, dtype=np.uint8).reshape(self.rows, self.cols)
+        self.max_range = max_range
+
+    def reaching(self, tile):
+        """Row-major boolean grid of the floor tiles connected to tile or to a floor tile beside it."""
+        field = FlowField(self.tile_map, max_distance=None)
+        field.update(tile)
+        return (np.frombuffer(field.distances, dtype=np.int32) >= 0) & (self.floor.ravel() == 1)
+
+    def distance(self, start, goal):
+        """Number of steps along path(start, goal), or -1 if it has none."""
+        return len(self.path(start, goal)) - 1
+
+    def path(self, start, goal):
+        """Shortest path from start to goal within max_range tiles of both, or [] if there is none there."""
+        reach = self.max_range
+        bounds = (max(min(start[0], goal[0]) - reach, 0), max(min(start[1], goal[1]) - reach, 0),
+                  min(max(start[0], goal[0]) + reach + 1, self.rows), min(max(start[1], goal[1]) + reach + 1, self.cols))
+        if not (bounds[0] <= start[0] < bounds[2] and bounds[1] <= start[1] < bounds[3]):
+            return []
+        return astar(self.walkable, self.rows, self.cols, start, goal, bounds)
+
+    def pick_wander_target(self, current_tile, position, previous_tile=None, rng=random):
+        """Draw a floor tile within max_range tiles and far enough from position, or None if none qualifies."""
+        row, col = current_tile
+        if not self.tile_map.is_walkable(row, col):
+            return None
+        reach = self.max_range
+        top, left = max(row - reach, 0), max(col - reach, 0)
+        rows, cols = np.nonzero(self.floor[top:row + reach + 1, left:col + reach + 1])
+        rows += top
+        cols += left
+        center_x = cols * TILE_SIZE + TILE_SIZE // 2
+        center_y = rows * TILE_SIZE + TILE_SIZE // 2
+        keep = np.hypot(center_x - position[0], center_y - position[1]) >= MIN_TARGET_DISTANCE
+        keep &= (rows != row) | (cols != col)
+        if previous_tile is not None:
+            keep &= (rows != previous_tile[0]) | (cols != previous_tile[1])
+        candidates = np.flatnonzero(keep)
+        if not len(candidates):
+            return None
+        pick = candidates[rng.randrange(len(candidates))]
+        return (int(rows[pick]), int(cols[pick]))
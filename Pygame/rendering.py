@@ -1,11 +1,11 @@
 import math
 import pygame
+from collections import OrderedDict
 from game_objects import get_tile_position
+from assets import load_font, render_text
 from config import *
 
-def create_radial_gradient(base_radius, time_factor, fade_color_alpha=180):
-    pulsation = int(10 * math.sin(time_factor))  # Pulsates between -10 and +10
-    radius = base_radius + pulsation
+def render_radial_gradient(radius, fade_color_alpha=180):
     size = radius * 2
     gradient_surface = pygame.Surface((size, size), pygame.SRCALPHA)
     for i in range(radius, 0, -1):
@@ -13,73 +13,185 @@ def create_radial_gradient(base_radius, time_factor, fade_color_alpha=180):
         pygame.draw.circle(gradient_surface, (0, 0, 0, alpha), (radius, radius), i)
     return gradient_surface
 
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-
-def draw_path(path_list):
+def draw_path(screen, path_list, offset=(0, 0), area=None):
+    """Dots on the path tiles, moved by offset; with area, a map rect, dots outside it are skipped."""
     if path_list:
         for tile in path_list:
             pos = get_tile_position(tile[0], tile[1])
-            pygame.draw.circle(screen, (0, 255, 0), pos, 5)  # Small green circles for path tiles
-
-def update_darkness(player_pos, visibility_gradient, darkness, time_factor):
-    # Clear the darkness surface
-    darkness.fill((0, 0, 0, 255))  # Fully opaque black background
-
-    # Create a swirling offset for the fog
-    offset_x = int(10 * math.sin(time_factor / 2))  # Sway horizontally
-    offset_y = int(10 * math.cos(time_factor / 2))  # Sway vertically
-    gradient_pos = (player_pos[0] - VISIBILITY_RADIUS + offset_x, 
-                    player_pos[1] - VISIBILITY_RADIUS + offset_y)
-
-    # Position the gradient around the player
-    darkness.blit(visibility_gradient, gradient_pos, special_flags=pygame.BLEND_RGBA_SUB)
-
-def draw_radar(screen, player_pos, tracker_pos, radar_center, radar_radius, sweep_angle, max_radar_distance=500, trail_length=10):
-    # Create a radar surface with per-pixel alpha
-    radar_surface = pygame.Surface((radar_radius * 2, radar_radius * 2), pygame.SRCALPHA)
-
-    # Draw radar background first
-    pygame.draw.circle(radar_surface, (0, 50, 0, 200), (radar_radius, radar_radius), radar_radius)
-    for i in range(1, 5):  # Draw concentric circles
-        pygame.draw.circle(radar_surface, (0, 100, 0, 200), (radar_radius, radar_radius), radar_radius * i // 5, 1)
-    
-    # Player position with green dot
-    pygame.draw.circle(radar_surface, (0, 255, 0, 255), (radar_radius, radar_radius), 5)
-
-    # Calculate tracker position
-    dx = tracker_pos[0] - player_pos[0]
-    dy = tracker_pos[1] - player_pos[1]
-    distance = math.hypot(dx, dy)
-
-    if 0 < distance <= max_radar_distance:  # Limit tracker display range
-        direction_x = dx / distance
-        direction_y = dy / distance
-        scaled_distance = min(distance / max_radar_distance * radar_radius, radar_radius)
-
-        tracker_radar_x = radar_radius + direction_x * scaled_distance
-        tracker_radar_y = radar_radius + direction_y * scaled_distance
-
-        # Tracker position with white dot
-        pygame.draw.circle(radar_surface, (255, 255, 255, 255), (int(tracker_radar_x), int(tracker_radar_y)), 7)
-
-    # Draw the sweeping line and its fading trail
-    trail_length = 100  # Adjust as needed for desired trail length
-    trail_spacing = 0.375  # Degrees between trailing lines
-
-    for i in range(trail_length):
-        # Calculate the angle for each trailing line
-        angle = sweep_angle - i * trail_spacing
-        angle_rad = math.radians(angle)
-        end_x = radar_radius + radar_radius * math.cos(angle_rad)
-        end_y = radar_radius + radar_radius * math.sin(angle_rad)
-        
-        # Calculate alpha for fading effect (use exponential decay for more natural fading)
-        alpha = int(255 * (0.99 ** i))  # Exponential decay: smaller `0.9` gives faster fade
-        sweep_color = (0, 50, 0, alpha)
-        
-        # Draw the trailing line
-        pygame.draw.line(radar_surface, sweep_color, (radar_radius, radar_radius), (end_x, end_y), 2)
-
-    # Blit the radar surface to the main screen
-    screen.blit(radar_surface, (radar_center[0] - radar_radius, radar_center[1] - radar_radius))
-
+            if area is not None and not area.inflate(10, 10).collidepoint(pos):
+                continue
+            pygame.draw.circle(screen, (0, 255, 0), (pos[0] - offset[0], pos[1] - offset[1]), 5)  # Small green circles for path tiles
+
+class FogRenderer:
+    """Darkness everywhere except a pulsating window around the player.
+
+    Outside the window the fog is plain opaque black, so it is filled with rects and only the
+    window is alpha-blended. The window's darkness mask depends only on its radius and is cached.
+    With mask_scale above 1 masks are rendered at that fraction of the size and upscaled.
+    """
+
+    def __init__(self, radius=VISIBILITY_RADIUS, fade_color_alpha=180, mask_scale=FOG_MASK_SCALE):
+        self.radius = radius
+        self.fade_color_alpha = fade_color_alpha
+        self.mask_scale = mask_scale
+        self.masks = OrderedDict()  # Radius -> window mask, least recently used first
+        self.mask = None
+        self.rect = None  # Window covered by the mask, in screen coordinates
+
+    def window_mask(self, radius):
+        """Black with the gradient subtracted from its alpha, the darkness inside the window."""
+        mask = self.masks.get(radius)
+        if mask is not None:
+            self.masks.move_to_end(radius)
+            return mask
+        gradient = render_radial_gradient(max(radius // self.mask_scale, 1), self.fade_color_alpha)
+        if self.mask_scale > 1:
+            gradient = pygame.transform.smoothscale(gradient, (radius * 2, radius * 2))
+        mask = pygame.Surface(gradient.get_size(), pygame.SRCALPHA)
+        mask.fill((0, 0, 0, 255))  # Fully opaque black background
+        mask.blit(gradient, (0, 0), special_flags=pygame.BLEND_RGBA_SUB)
+        self.masks[radius] = mask
+        if len(self.masks) > GRADIENT_CACHE_SIZE:
+            self.masks.popitem(last=False)
+        return mask
+
+    def update(self, center, time_factor):
+        """Move the window to center, given in screen coordinates. Returns the window rect."""
+        pulsation = int(10 * math.sin(time_factor))  # Pulsates between -10 and +10
+        self.mask = self.window_mask(self.radius + pulsation)
+
+        # Create a swirling offset for the fog
+        offset_x = int(10 * math.sin(time_factor / 2))  # Sway horizontally
+        offset_y = int(10 * math.cos(time_factor / 2))  # Sway vertically
+        self.rect = self.mask.get_rect(topleft=(center[0] - self.radius + offset_x,
+                                                center[1] - self.radius + offset_y))
+        return self.rect
+
+    def draw(self, screen):
+        """Darken the screen, within its current clip."""
+        bounds, window = screen.get_rect(), self.rect
+        # The bands above and below the window, then left and right of it
+        for band in (pygame.Rect(bounds.left, bounds.top, bounds.width, window.top - bounds.top),
+                     pygame.Rect(bounds.left, window.bottom, bounds.width, bounds.bottom - window.bottom),
+                     pygame.Rect(bounds.left, window.top, window.left - bounds.left, window.height),
+                     pygame.Rect(window.right, window.top, bounds.right - window.right, window.height)):
+            if band.width > 0 and band.height > 0:
+                screen.fill((0, 0, 0), band)
+        screen.blit(self.mask, window)
+
+def bake_background(walls, size=(WIDTH, HEIGHT), convert=True, origin=(0, 0)):
+    """Draw the floor and every wall once into a single opaque surface for the level.
+
+    Pass convert=False when baking off the main thread, and convert once the level is shown.
+    origin is the map pixel drawn at the top left, for a surface covering part of the map.
+    """
+    background = pygame.Surface(size)
+    if convert:
+        background = background.convert()
+    background.fill(WHITE)
+    if origin == (0, 0):
+        walls.draw(background)
+    else:
+        background.blits([(wall.image, wall.rect.move(-origin[0], -origin[1])) for wall in walls], doreturn=False)
+    return background
+
+class RadarRenderer:
+    """Radar whose background and sweep trail are rendered ahead of time and only composited per frame."""
+
+    def __init__(self, radar_center, radar_radius, max_radar_distance=500,
+                 angle_steps=RADAR_ANGLE_STEPS, trail_length=100, trail_spacing=0.375):
+        self.radar_radius = radar_radius
+        self.max_radar_distance = max_radar_distance
+        self.angle_steps = angle_steps
+        self.trail_length = trail_length
+        self.trail_spacing = trail_spacing  # Degrees between trailing lines
+        self.rect = pygame.Rect(0, 0, radar_radius * 2, radar_radius * 2)
+        self.rect.center = radar_center
+        self.background = self.render_background()
+        self.trail_sprites = {}  # Quantized angle index -> (cropped trail surface, offset)
+
+    def render_background(self):
+        radar_radius = self.radar_radius
+        background = pygame.Surface((radar_radius * 2, radar_radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(background, (0, 50, 0, 200), (radar_radius, radar_radius), radar_radius)
+        for i in range(1, 5):  # Draw concentric circles
+            pygame.draw.circle(background, (0, 100, 0, 200), (radar_radius, radar_radius), radar_radius * i // 5, 1)
+        # Player position with green dot, always at the center
+        pygame.draw.circle(background, (0, 255, 0, 255), (radar_radius, radar_radius), 5)
+        return background
+
+    def render_trail(self, sweep_angle):
+        radar_radius = self.radar_radius
+        trail_surface = pygame.Surface((radar_radius * 2, radar_radius * 2), pygame.SRCALPHA)
+        for i in range(self.trail_length):
+            # Calculate the angle for each trailing line
+            angle_rad = math.radians(sweep_angle - i * self.trail_spacing)
+            end_x = radar_radius + radar_radius * math.cos(angle_rad)
+            end_y = radar_radius + radar_radius * math.sin(angle_rad)
+
+            # Calculate alpha for fading effect (use exponential decay for more natural fading)
+            alpha = int(255 * (0.99 ** i))
+            pygame.draw.line(trail_surface, (0, 50, 0, alpha), (radar_radius, radar_radius), (end_x, end_y), 2)
+
+        # Keep only the wedge the trail covers
+        bounds = trail_surface.get_bounding_rect()
+        return trail_surface.subsurface(bounds).copy(), bounds.topleft
+
+    def get_trail(self, sweep_angle):
+        step = int(sweep_angle % 360 / 360 * self.angle_steps) % self.angle_steps
+        trail = self.trail_sprites.get(step)
+        if trail is None:
+            trail = self.render_trail(step * 360 / self.angle_steps)
+            self.trail_sprites[step] = trail
+        return trail
+
+    def draw(self, screen, player_pos, tracker_positions, sweep_angle):
+        """Draw the radar with one blip per tracker in range. Returns the screen rect it covers."""
+        screen.blit(self.background, self.rect)
+        trail_sprite, offset = self.get_trail(sweep_angle)
+        screen.blit(trail_sprite, (self.rect.x + offset[0], self.rect.y + offset[1]))
+
+        radar_radius = self.radar_radius
+        for tracker_pos in tracker_positions:
+            dx = tracker_pos[0] - player_pos[0]
+            dy = tracker_pos[1] - player_pos[1]
+            distance = math.hypot(dx, dy)
+
+            if 0 < distance <= self.max_radar_distance:  # Limit tracker display range
+                scaled_distance = min(distance / self.max_radar_distance * radar_radius, radar_radius)
+                tracker_radar_x = self.rect.centerx + dx / distance * scaled_distance
+                tracker_radar_y = self.rect.centery + dy / distance * scaled_distance
+
+                # Tracker position with white dot
+                pygame.draw.circle(screen, (255, 255, 255), (int(tracker_radar_x), int(tracker_radar_y)), 7)
+        return self.rect
+
+class ProfilerOverlay:
+    """Table of per-phase frame percentiles, re-rendered only every few frames."""
+
+    def __init__(self, position=(10, 10), refresh_frames=30):
+        self.font = load_font('courier', 18)
+        self.position = position
+        self.refresh_frames = refresh_frames
+        self.frames_until_refresh = 0
+        self.surface = None
+
+    def render(self, profiler):
+        lines = ["phase          p50    p95    p99 ms"]
+        for phase, p50, p95, p99 in profiler.summary():
+            lines.append(f"{phase:<12}{p50:>6.2f} {p95:>6.2f} {p99:>6.2f}")
+        line_height = self.font.get_linesize()
+        width = max(self.font.size(line)[0] for line in lines) + 10
+        surface = pygame.Surface((width, line_height * len(lines) + 10))
+        surface.fill((0, 0, 0))
+        for i, line in enumerate(lines):
+            surface.blit(render_text(self.font, line, GREEN_LIGHT), (5, 5 + i * line_height))
+        return surface
+
+    def draw(self, screen, profiler):
+        """Draw the overlay and return the screen rect it covers."""
+        if self.frames_until_refresh <= 0 or self.surface is None:
+            self.surface = self.render(profiler)
+            self.frames_until_refresh = self.refresh_frames
+        self.frames_until_refresh -= 1
+        return screen.blit(self.surface, self.position)
@@ -0,0 +1,98 @@
+# replay.py
+"""Play a recorded session back without a display, as fast as the simulation runs.
+
+    python replay.py last_session.rec
+"""
+import struct
+import sys
+import time
+from config import *
+from simulation import LEVELS, PlayerInput, GameState
+
+# Recording file: header, then (input code, steps) runs
+RECORDING_MAGIC = b"ALRP"
+RECORDING_VERSION = 2  # 2: spawns drawn from the level's SpawnIndex
+RECORDING_HEADER = struct.Struct("<4sHIHHH")  # magic, version, seed, level index, tracker count, step rate
+RUN = struct.Struct("<BH")
+MAX_RUN = 0xFFFF
+
+def encode_input(player_input):
+    """Pack a PlayerInput into one byte: two bits per axis, one per movement mode."""
+    return ((player_input.dx + 1) | (player_input.dy + 1) << 2
+            | player_input.sneak << 4 | player_input.sprint << 5)
+
+def decode_input(code):
+    return PlayerInput((code & 3) - 1, (code >> 2 & 3) - 1, bool(code & 16), bool(code & 32))
+
+class Recording:
+    """Seed, starting level and the input of every simulation step, run-length encoded."""
+
+    def __init__(self, seed, level_index=0, tracker_count=TRACKER_COUNT, step_rate=STEP_RATE, runs=None):
+        self.seed = seed
+        self.level_index = level_index
+        self.tracker_count = tracker_count
+        self.step_rate = step_rate
+        self.runs = runs if runs is not None else []  # [input code, steps] pairs
+
+    def record(self, player_input):
+        code = encode_input(player_input)
+        if self.runs and self.runs[-1][0] == code and self.runs[-1][1] < MAX_RUN:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([code, 1])
+
+    @property
+    def steps(self):
+        return sum(count for _, count in self.runs)
+
+    def inputs(self):
+        for code, count in self.runs:
+            player_input = decode_input(code)
+            for _ in range(count):
+                yield player_input
+
+    def save(self, file_path):
+        with open(file_path, "wb") as f:
+            f.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.seed, self.level_index,
+                                          self.tracker_count, self.step_rate))
+            for code, count in self.runs:
+                f.write(RUN.pack(code, count))
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "rb") as f:
+            data = f.read()
+        magic, version, seed, level_index, tracker_count, step_rate = RECORDING_HEADER.unpack_from(data)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError(f"{file_path} is not a version {RECORDING_VERSION} recording.")
+        runs = [list(run) for run in RUN.iter_unpack(data[RECORDING_HEADER.size:])]
+        return cls(seed, level_index, tracker_count, step_rate, runs)
+
+def replay(recording, levels=LEVELS, profiler=None):
+    """Run the recorded steps headless. Returns the final GameState and the outcomes in order.
+
+    Getting caught or finishing the game restarts from the first level, as the game does.
+    """
+    state = GameState(levels, recording.level_index, recording.tracker_count, profiler, seed=recording.seed)
+    dt = 1 / recording.step_rate
+    outcomes = []
+    outcome = None
+    for player_input in recording.inputs():
+        if outcome in ('caught', 'game_complete'):
+            state.restart()  # Only once there is more to play, so the final state is where the game ended
+        outcome = state.step(dt, player_input)
+        if outcome is not None:
+            outcomes.append(outcome)
+    return state, outcomes
+
+if __name__ == "__main__":
+    recording = Recording.load(sys.argv[1] if len(sys.argv) > 1 else RECORDING_FILE)
+    start = time.perf_counter()
+    state, outcomes = replay(recording)
+    elapsed = time.perf_counter() - start
+    session = recording.steps / recording.step_rate
+    print(f"{recording.steps} steps ({session:.1f}s of play) replayed in {elapsed:.2f}s, "
+          f"{session / elapsed:.1f}x real time")
+    print(f"seed {recording.seed}, outcomes {outcomes}")
+    print(f"final level {state.level_index}, player {state.player.rect.center}, trackers {state.swarm.positions()}")
+    state.loader.shutdown()
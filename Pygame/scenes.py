@@ -0,0 +1,150 @@
+# scenes.py
+import json
+import time
+import pygame
+from config import *
+from assets import music_source
+from profiler import FrameProfiler
+import tracing
+
+trace = tracing.channel('scenes')
+
+class Scene:
+    """One screen of the program. The manager calls frame() once per display frame while it is current."""
+
+    caption = "Alienation"
+    size = (WIDTH, HEIGHT)
+    fps = MENU_FPS
+    music = None  # Looped while the scene is current, left playing when the next scene shares it
+    profiler = FrameProfiler(enabled=False)
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def enter(self, **kwargs):
+        """Called every time the scene becomes current."""
+
+    def frame(self, dt, events):
+        """Handle events, advance by dt seconds and draw. Returns the dirty rects, or None to flip everything."""
+        raise NotImplementedError
+
+    def close(self):
+        """Called once when the program ends."""
+
+class SceneManager:
+    """Owns the display, mixer and clock, and runs the current scene until quit() is called."""
+
+    def __init__(self, launch_time=None):
+        self.launch_time = launch_time if launch_time is not None else time.perf_counter()
+        pygame.init()
+        pygame.mixer.init()
+        self.screen = None
+        self.clock = pygame.time.Clock()
+        self.scenes = {}
+        self.scene = None
+        self.music = None
+        self.next_scene = None  # (name, enter kwargs), applied at the start of the next frame
+        self.switch_start = None  # When the pending switch was requested, until its first frame is shown
+        # Milliseconds since launch: first frame shown, game assets resident, and the later of the two
+        self.timings = {"startup_ms": None, "assets_ready_ms": None, "playable_ms": None, "switches": []}
+        self.running = False
+
+    def add(self, name, scene_class, *args):
+        self.scenes[name] = scene_class(self, *args)
+
+    def switch(self, name, **kwargs):
+        """Make another scene current from the next frame on."""
+        self.next_scene = (name, kwargs)
+        self.switch_start = time.perf_counter()
+
+    def quit(self):
+        self.running = False
+
+    def mark_assets_ready(self, at=None):
+        """Record when everything the game needs was loaded, the first time only. Safe from any thread."""
+        if self.timings["assets_ready_ms"] is None:
+            self.timings["assets_ready_ms"] = round(((at or time.perf_counter()) - self.launch_time) * 1000, 2)
+            trace.info("Game assets ready %.1f ms after launch", self.timings["assets_ready_ms"])
+            self._update_playable()
+
+    def _update_playable(self):
+        """Playable once the first frame is up and the game assets are loaded, whichever is later."""
+        if self.timings["startup_ms"] is not None and self.timings["assets_ready_ms"] is not None:
+            self.timings["playable_ms"] = max(self.timings["startup_ms"], self.timings["assets_ready_ms"])
+
+    def play_music(self, file_path):
+        if file_path == self.music:
+            return
+        self.music = file_path
+        if file_path is None:
+            pygame.mixer.music.stop()
+            return
+        try:
+            pygame.mixer.music.load(*music_source(file_path))
+            pygame.mixer.music.play(-1)  # -1 means loop indefinitely
+        except pygame.error as e:
+            tracing.channel('audio').error("Unable to load MP3 file: %s", e)
+
+    def _enter(self, name, kwargs):
+        scene = self.scenes[name]
+        if self.screen is None or self.screen.get_size() != scene.size:
+            self.screen = pygame.display.set_mode(scene.size)  # Same window, only resized
+        pygame.display.set_caption(scene.caption)
+        self.play_music(scene.music)
+        self.scene = scene
+        scene.enter(**kwargs)
+        self.clock.tick()  # Loading time is not part of the new scene's first step
+
+    def _record_switch(self):
+        elapsed = (time.perf_counter() - self.switch_start) * 1000
+        name = next(key for key, scene in self.scenes.items() if scene is self.scene)
+        if self.timings["startup_ms"] is None:
+            self.timings["startup_ms"] = round((time.perf_counter() - self.launch_time) * 1000, 2)
+            trace.info("First frame %.1f ms after launch", self.timings["startup_ms"])
+            self._update_playable()
+        else:
+            self.timings["switches"].append({"scene": name, "ms": round(elapsed, 2)})
+            trace.info("Switched to %s in %.1f ms", name, elapsed)
+        self.switch_start = None
+
+    def run(self, first_scene):
+        self.switch(first_scene)
+        self.running = True
+        while self.running:
+            if self.next_scene is not None:
+                name, kwargs = self.next_scene
+                self.next_scene = None
+                self._enter(name, kwargs)
+            scene = self.scene
+
+            scene.profiler.begin_frame()
+            dt = self.clock.tick(scene.fps) / 1000
+            scene.profiler.lap('wait')
+
+            events = pygame.event.get()
+            if any(event.type == pygame.QUIT for event in events):
+                break
+            dirty_rects = scene.frame(dt, events)
+            if dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
+            scene.profiler.lap('display')
+
+            if self.switch_start is not None and self.next_scene is None:
+                self._record_switch()
+        self.close()
+
+    def close(self):
+        for scene in self.scenes.values():
+            scene.close()
+        self.save_timings()
+        pygame.quit()
+
+    def save_timings(self, file_path=STARTUP_LOG):
+        """Append this run's startup and switch times, so they can be compared across runs."""
+        try:
+            with open(file_path, "a") as f:
+                f.write(json.dumps(dict(self.timings, timestamp=time.time())) + "\n")
+        except OSError as e:
+            trace.warning("Could not write startup times to %s: %s", file_path, e)
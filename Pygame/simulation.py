@@ -0,0 +1,191 @@
+# simulation.py
+import math
+import random
+import sys
+import time
+from collections import namedtuple
+import numpy as np
+import pygame
+from config import *
+from level import LevelLoader
+from game_objects import Player, Tracker, get_tile_position
+from swarm import Swarm
+from flow_field import FlowField
+from profiler import FrameProfiler
+import tracing
+
+trace = tracing.channel('level')
+
+# Load all maps for levels
+LEVELS = [f"map/map{i + 1}.txt" for i in range(5)]
+
+# One frame of player input: direction (-1, 0 or 1 per axis) and movement mode
+PlayerInput = namedtuple('PlayerInput', ['dx', 'dy', 'sneak', 'sprint'])
+IDLE_INPUT = PlayerInput(0, 0, False, False)
+
+def input_from_keys(keys):
+    """Translate pygame.key.get_pressed() into a PlayerInput."""
+    dx, dy = 0, 0
+    if keys[pygame.K_w]: dy = -1
+    if keys[pygame.K_s]: dy = 1
+    if keys[pygame.K_a]: dx = -1
+    if keys[pygame.K_d]: dx = 1
+    return PlayerInput(dx, dy, bool(keys[pygame.K_c]), bool(keys[pygame.K_SPACE]))
+
+class GameState:
+    """Level, player, trackers and timers, advanced by step() without any display."""
+
+    def __init__(self, levels=LEVELS, level_index=0, tracker_count=TRACKER_COUNT, profiler=None, loader=None,
+                 seed=None):
+        self.levels = levels
+        # Every random choice of the session comes from here, so the seed and inputs reproduce a run
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.loader = loader if loader is not None else LevelLoader(levels)
+        self.tracker_count = tracker_count
+        self.profiler = profiler if profiler is not None else FrameProfiler(enabled=False)
+        self.time_factor = 0  # Time factor for dynamic effects
+        self.sweep_angle = 0
+        self.load_level(level_index)
+
+    def load_level(self, level_index):
+        """Switch to a level, built ahead of time by the loader when possible."""
+        self.level_index = level_index
+        self.level = self.loader.get(level_index)
+        self.tile_map = self.level.tile_map
+        self.map_layout = self.level.map_layout
+        self.walls, self.walkable_tiles = self.level.walls, self.level.walkable_tiles
+        self.collision_grid = self.level.collision_grid
+        self.reachability = self.level.reachability
+        self.line_of_sight = self.level.line_of_sight
+        self.goal_tile = self.level.goal_tile
+        self.flow_field = FlowField(self.tile_map)  # Rebuilt as the player moves while followed, so one per play
+        trace.info("Loaded level %d from %s", level_index, self.levels[level_index])
+
+        self.reset()
+
+    def reset(self):
+        """Respawn player and trackers on the current level without reloading it."""
+        # Spawn the player away from the goal, then every tracker away from the player
+        spawns = self.level.spawns
+        player_tile = spawns.player_tile(self.rng)
+        tracker_tiles = spawns.tracker_tiles(player_tile, self.tracker_count, self.rng)
+
+        # Initialize player and trackers
+        self.player = Player(*get_tile_position(*player_tile), RED, speed=150)
+        self.swarm = Swarm(capacity=self.tracker_count)
+        self.trackers = [Tracker(*get_tile_position(*tile), BLUE, WANDER_SPEED, FOLLOW_SPEED, VISIBILITY_RADIUS,
+                                 self.swarm, self.rng)
+                         for tile in tracker_tiles]
+        self.store_previous_positions()
+
+    def store_previous_positions(self):
+        self.previous_player_center = self.player.rect.center
+        self.previous_tracker_positions = self.swarm.position[:self.swarm.count].copy()
+
+    def interpolated_positions(self, alpha):
+        """Player and tracker centers between the previous step (alpha 0) and the latest one (alpha 1)."""
+        previous = self.previous_tracker_positions
+        current = self.swarm.position[:self.swarm.count]
+        offset = current - previous
+        blended = previous + offset * alpha
+        # Teleports jump straight to the new tile instead of sliding across the map
+        jumped = np.hypot(offset[:, 0], offset[:, 1]) > TILE_SIZE
+        blended[jumped] = current[jumped]
+
+        (previous_x, previous_y), (x, y) = self.previous_player_center, self.player.rect.center
+        player_center = (round(previous_x + (x - previous_x) * alpha), round(previous_y + (y - previous_y) * alpha))
+        return player_center, [tuple(center) for center in np.rint(blended).astype(int).tolist()]
+
+    @property
+    def tracker(self):
+        """The first tracker, for single-alien levels."""
+        return self.trackers[0]
+
+    def restart(self):
+        """Start over from the first level after a game over, reusing its loaded map."""
+        self.load_level(0)
+
+    def step(self, dt, player_input):
+        """Advance the game by dt seconds.
+
+        Returns None while playing, 'caught' when the tracker reaches the player,
+        'level_complete' after the next level has been loaded, or 'game_complete'.
+        """
+        player = self.player
+        self.store_previous_positions()
+
+        # Determine player's movement speed and adjust DISTANCE_THRESHOLD
+        if player_input.sneak:  # Sneak mode
+            current_speed = SNEAK_SPEED
+            current_distance_threshold = DISTANCE_THRESHOLD * 0.5  # Reduced threshold for sneaking
+        elif player_input.sprint:  # Sprint mode
+            current_speed = RUN_SPEED
+            current_distance_threshold = DISTANCE_THRESHOLD * 2.5  # Increased threshold for sprinting
+        else:  # Normal mode
+            current_speed = player.speed
+            current_distance_threshold = DISTANCE_THRESHOLD  # Default threshold
+
+        # Normalize diagonal movement
+        dx, dy = player_input.dx, player_input.dy
+        if dx != 0 and dy != 0:
+            dx *= math.sqrt(0.5)
+            dy *= math.sqrt(0.5)
+
+        # Update player's position, checking only the wall tiles the player overlaps
+        player.move_with_collision(dx * current_speed * dt, dy * current_speed * dt, self.collision_grid)
+        self.profiler.lap('collision')
+
+        # Update sweep angle and fog time
+        self.sweep_angle = (self.sweep_angle + SWEEP_SPEED * dt) % 360
+        self.time_factor += dt
+
+        # Tracker logic based on adjusted DISTANCE_THRESHOLD, for every tracker at once
+        self.swarm.update(dt, player, current_distance_threshold, self.map_layout, self.walkable_tiles,
+                          self.flow_field, self.reachability, self.line_of_sight)
+        self.profiler.lap('ai')
+
+        # Check for collision between player and any tracker
+        if self.swarm.collides(player.rect):
+            return 'caught'
+
+        # Check for level transition
+        outcome = self.check_goal()
+        self.profiler.lap('level')
+        return outcome
+
+    def check_goal(self):
+        """Load the next level once the player stands on the goal tile."""
+        player = self.player
+        player_tile = (player.rect.centery // TILE_SIZE, player.rect.centerx // TILE_SIZE)
+        if player_tile == self.tile_map.goal:
+            if self.level_index + 1 < len(self.levels):
+                self.load_level(self.level_index + 1)
+                return 'level_complete'
+            return 'game_complete'
+        return None
+
+def random_policy(state):
+    """Wander in a random direction, used for headless AI episodes."""
+    return PlayerInput(random.choice((-1, 0, 1)), random.choice((-1, 0, 1)), False, False)
+
+def run_episode(state, policy=random_policy, max_steps=STEP_RATE * 60, dt=STEP_DT):
+    """Play one episode from a fresh spawn. Returns (outcome, steps taken)."""
+    state.reset()
+    for steps in range(1, max_steps + 1):
+        outcome = state.step(dt, policy(state))
+        if outcome in ('caught', 'game_complete'):
+            return outcome, steps
+    return 'timeout', max_steps
+
+if __name__ == "__main__":
+    # Headless run: python simulation.py [episodes] [level]
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    state = GameState(level_index=int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    outcomes = {}
+    start = time.perf_counter()
+    for _ in range(episodes):
+        outcome, steps = run_episode(state)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    elapsed = time.perf_counter() - start
+    print(f"{episodes} episodes in {elapsed:.2f}s ({episodes / elapsed:.1f}/s): {outcomes}")
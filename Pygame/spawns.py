@@ -0,0 +1,67 @@
+# spawns.py
+import numpy as np
+from config import SPAWN_GOAL_DISTANCE, SPAWN_TRACKER_DISTANCE
+from reachability import draw_skipping
+
+def disc_offsets(radius):
+    """(row, col) offsets within radius tiles of a tile, itself included."""
+    return [(dr, dc) for dr in range(-radius, radius + 1) for dc in range(-radius, radius + 1)
+            if dr * dr + dc * dc <= radius * radius]
+
+class SpawnIndex:
+    """Where the player and the trackers may start on a level, worked out once at load.
+
+    The player starts more than goal_distance tiles from the goal, on floor connected to it,
+    and only where at least one floor tile is more than tracker_distance tiles away for the
+    trackers. Drawing a spawn then never retries: the player's tile is one pick from a list, and
+    each tracker's one pick among the floor tiles with the few close to the player skipped.
+    Tiles are kept as row-major indices in NumPy arrays, so large maps cost a few bytes a tile.
+    """
+
+    def __init__(self, tile_map, reachability, goal_distance=SPAWN_GOAL_DISTANCE,
+                 tracker_distance=SPAWN_TRACKER_DISTANCE):
+        self.tracker_offsets = disc_offsets(tracker_distance)
+        self.rows, self.cols = rows, cols = tile_map.rows, tile_map.cols
+        if tile_map.goal is None:
+            raise ValueError("No goal ('G') to spawn away from.")
+        goal_row, goal_col = tile_map.goal
+
+        floor = np.frombuffer(tile_map.mask(" "), dtype=np.uint8).reshape(rows, cols)
+        self.tiles = np.flatnonzero(floor).astype(np.int32)  # Tracker candidates, every floor tile
+        total = len(self.tiles)
+
+        # Floor tiles within tracker_distance of each tile, counted for the whole map at once.
+        # A map with more floor than the circle holds has room for the trackers everywhere
+        if total > len(self.tracker_offsets):
+            room = np.ones((rows, cols), dtype=bool)
+        else:
+            reach = tracker_distance
+            padded = np.pad(floor.astype(np.int32), reach)
+            nearby = np.zeros((rows, cols), dtype=np.int32)
+            for dr, dc in self.tracker_offsets:
+                nearby += padded[reach + dr:reach + dr + rows, reach + dc:reach + dc + cols]
+            room = total - nearby > 0
+
+        # The goal is not floor itself, so it is reached through the floor next to it
+        row_index, col_index = np.ogrid[:rows, :cols]
+        far = (row_index - goal_row) ** 2 + (col_index - goal_col) ** 2 > goal_distance * goal_distance
+        connected = reachability.reaching(tile_map.goal).reshape(rows, cols)
+        self.player_tiles = np.flatnonzero((floor == 1) & connected & far & room).astype(np.int32)
+        if not len(self.player_tiles):
+            raise ValueError(f"No player spawn more than {goal_distance} tiles from a reachable goal "
+                             f"with room for trackers {tracker_distance} tiles away.")
+
+    def player_tile(self, rng):
+        return divmod(int(rng.choice(self.player_tiles)), self.cols)
+
+    def tracker_tiles(self, player_tile, count, rng):
+        """count floor tiles, repeats allowed, each more than tracker_distance tiles from player_tile."""
+        row, col = player_tile
+        near = np.array([(row + dr) * self.cols + col + dc for dr, dc in self.tracker_offsets
+                         if 0 <= row + dr < self.rows and 0 <= col + dc < self.cols], dtype=np.int32)
+        positions = np.searchsorted(self.tiles, near)
+        found = positions < len(self.tiles)
+        found[found] = self.tiles[positions[found]] == near[found]
+        excluded = sorted(positions[found].tolist())
+        return [divmod(int(self.tiles[draw_skipping(rng, len(self.tiles), excluded)]), self.cols)
+                for _ in range(count)]
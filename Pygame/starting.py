@@ -1,24 +1,16 @@
+import time
+LAUNCH_TIME = time.perf_counter()  # Startup time is measured from here, before the imports
 import pygame
 import random
-import sys
-import subprocess  # Import subprocess for running external scripts
-
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()
-
-mp3_file = "Alien Soundtrack Track 6 The Passage Jerry Goldsmith.mp3"
-try:
-  pygame.mixer.music.load(mp3_file)
-  pygame.mixer.music.play(-1)  # -1 means loop indefinitely
-except pygame.error as e:
-  print(f"Unable to load MP3 file: {e}")
-  sys.exit()
+import os
+import tracing
+from config import TRACE_DUMP_FILE
+from assets import load_font, render_text
+from scenes import Scene, SceneManager
+from main import add_game_scenes
 
 # Screen settings
 WIDTH, HEIGHT = 1200, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Alienation")
 
 # Colors
 BLACK = (0, 0, 0)
@@ -27,124 +19,165 @@ DARK_BLUE = (0, 30, 30)
 GRID_COLOR = (0, 50, 50)
 WHITE = (255, 255, 255)
 
-# Fonts
-font = pygame.font.Font(pygame.font.match_font('courier'), 50)  # Monospace font
-small_font = pygame.font.Font(pygame.font.match_font('courier'), 32)
+MENU_MUSIC = "Alien Soundtrack Track 6 The Passage Jerry Goldsmith.mp3"
 
 # Menu options
 menu_options = ["Play", "Credits"]
-selected_option = 0  # Tracks the currently selected menu option
 
 # Grid settings
 GRID_SIZE = 20  # Size of each grid cell
 GRID_ROWS = HEIGHT // GRID_SIZE
 GRID_COLS = WIDTH // GRID_SIZE
 
+# Fonts, loaded once the display exists
+def font():
+    return load_font('courier', 50)  # Monospace font
+
+def small_font():
+    return load_font('courier', 32)
+
 # Generate random numbers for the grid
 def generate_grid_data():
     return [[random.choice([" ", "•", random.randint(0, 9)]) for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
 
-# Draw grid with data
-def draw_grid(grid_data):
+# Draw grid with data onto an off-screen surface, once per regeneration
+def compose_grid(grid_data):
+    surface = pygame.Surface((WIDTH, HEIGHT)).convert()
+    surface.fill(DARK_BLUE)
     for y, row in enumerate(grid_data):
         for x, cell in enumerate(row):
             if cell == "•":
                 # Draw dot
-                pygame.draw.circle(screen, GRID_COLOR, (x * GRID_SIZE + GRID_SIZE // 2, y * GRID_SIZE + GRID_SIZE // 2), 2)
+                pygame.draw.circle(surface, GRID_COLOR, (x * GRID_SIZE + GRID_SIZE // 2, y * GRID_SIZE + GRID_SIZE // 2), 2)
             elif isinstance(cell, int):
-                # Draw numbers
-                text = small_font.render(str(cell), True, GRID_COLOR)
-                screen.blit(text, (x * GRID_SIZE + 5, y * GRID_SIZE + 5))
+                # Draw numbers, only ten distinct glyphs
+                text = render_text(small_font(), str(cell), GRID_COLOR)
+                surface.blit(text, (x * GRID_SIZE + 5, y * GRID_SIZE + 5))
+    return surface
 
 # Draw title and menu
-def draw_menu(selected_option):
+def draw_menu(screen, selected_option):
     # Title
-    title = font.render("ENVIRON CTR", True, BLUE)
+    title = render_text(font(), "ENVIRON CTR", BLUE)
     screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 20))
 
     # Menu options
     for i, option in enumerate(menu_options):
         color = BLUE if i == selected_option else WHITE
-        text = small_font.render(option, True, color)
+        text = render_text(small_font(), option, color)
         screen.blit(text, (WIDTH // 2 - text.get_width() // 2, 200 + i * 50))
 
 # Draw footer
-def draw_footer():
-    footer_text_1 = small_font.render("24556  DR 5", True, BLUE)
+def draw_footer(screen):
+    footer_text_1 = render_text(small_font(), "24556  DR 5", BLUE)
     screen.blit(footer_text_1, (20, HEIGHT - 40))
-    footer_text_2 = small_font.render("95654595  82008599", True, BLUE)
+    footer_text_2 = render_text(small_font(), "95654595  82008599", BLUE)
     screen.blit(footer_text_2, (WIDTH - 300, HEIGHT - 40))
 
-# Game pages
-def play_game():
-    try:
-        pygame.quit()  # 在啟動 main.py 之前關閉 Pygame 視窗
-        subprocess.run([sys.executable, "main.py"])  # 使用 sys.executable 啟動 main.py
-        sys.exit()  # 確保退出 starting.py
-    except FileNotFoundError:
-        # 處理找不到 main.py 的情況
-        pygame.init()  # 重新初始化 Pygame 以顯示錯誤訊息
-        screen.fill(DARK_BLUE)
-        error_message = small_font.render("Error: main.py not found!", True, BLUE)
-        screen.blit(error_message, (WIDTH // 2 - error_message.get_width() // 2, HEIGHT // 2 - 50))
-        pygame.display.flip()
-        pygame.time.wait(3000)  # 顯示 3 秒後退出
-        pygame.quit()
-        sys.exit()
-
-def credits_page():
-    screen.fill(DARK_BLUE)
-    text = font.render("Credits", True, BLUE)
-    screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - 50))
-    details = small_font.render("Designed by: Oscar Kuo, Benson Chen", True, WHITE)
-    screen.blit(details, (WIDTH // 2 - details.get_width() // 2, HEIGHT // 2 + 50))
-
-# Main loop
-clock = pygame.time.Clock()
-grid_data = generate_grid_data()
-update_timer = 0
-current_page = "menu"  # Tracks the current page: "menu", "play", "credits"
-
-while True:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.mixer.music.stop()  # Stop the music when quitting
-            pygame.quit()
-            sys.exit()
-
-        if current_page == "menu":
+# Draw how much of the game has loaded in the background
+def draw_progress(screen, done, total):
+    text = render_text(small_font(), "READY" if done == total else f"LOADING {done}/{total}", BLUE)
+    screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT - 40))
+
+class MenuScene(Scene):
+    """Title menu over the scrolling number grid."""
+
+    size = (WIDTH, HEIGHT)
+    music = MENU_MUSIC
+
+    def __init__(self, manager, start_warmup=None):
+        super().__init__(manager)
+        self.start_warmup = start_warmup  # Called once the first frame is up, returns a Warmup
+        self.warmup = None  # Game assets loading in the background, shown as progress in the footer
+        self.progress = None
+        self.selected_option = 0  # Tracks the currently selected menu option
+        self.grid_data = generate_grid_data()
+        self.grid_surface = None  # grid_data composed off-screen, rebuilt when the data changes
+        self.update_timer = 0
+
+    def enter(self):
+        self.changed = True  # Something else used the display, draw everything again
+
+    def frame(self, dt, events):
+        for event in events:
             # Menu navigation
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_w:  # Move up
-                    selected_option = (selected_option - 1) % len(menu_options)
+                    self.selected_option = (self.selected_option - 1) % len(menu_options)
+                    self.changed = True
                 elif event.key == pygame.K_s:  # Move down
-                    selected_option = (selected_option + 1) % len(menu_options)
+                    self.selected_option = (self.selected_option + 1) % len(menu_options)
+                    self.changed = True
                 elif event.key == pygame.K_RETURN:  # Select option
-                    if menu_options[selected_option] == "Play":
-                        play_game()  # Call the external game script
-                    elif menu_options[selected_option] == "Credits":
-                        current_page = "credits"
-        elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-            # Return to menu from any page
-            current_page = "menu"
-
-    # Clear the screen
-    screen.fill(DARK_BLUE)
-
-    # Update grid data periodically
-    update_timer += clock.get_time()
-    if update_timer > 500:  # Update every 500ms
-        grid_data = generate_grid_data()
-        update_timer = 0
-
-    # Render the current page
-    if current_page == "menu":
-        draw_grid(grid_data)
-        draw_menu(selected_option)
-        draw_footer()
-    elif current_page == "credits":
-        credits_page()
-
-    # Update the display
-    pygame.display.flip()
-    clock.tick(30)
\ No newline at end of file
+                    if menu_options[self.selected_option] == "Play":
+                        self.manager.switch('game')
+                    elif menu_options[self.selected_option] == "Credits":
+                        self.manager.switch('credits')
+
+        # Update grid data periodically
+        self.update_timer += dt * 1000
+        if self.update_timer > 500:  # Update every 500ms
+            self.grid_data = generate_grid_data()
+            self.grid_surface = None
+            self.update_timer = 0
+
+        # Start loading the game after the first frame, so the two do not compete for it
+        if self.warmup is None and self.start_warmup is not None and self.grid_surface is not None:
+            self.warmup = self.start_warmup()
+        if self.warmup is not None and self.warmup.progress() != self.progress:
+            self.progress = self.warmup.progress()
+            self.changed = True
+
+        # Between grid updates, key presses and loading progress nothing on screen changes
+        if not self.changed and self.grid_surface is not None:
+            return []
+        self.changed = False
+        if self.grid_surface is None:
+            self.grid_surface = compose_grid(self.grid_data)
+        screen = self.manager.screen
+        screen.blit(self.grid_surface, (0, 0))
+        draw_menu(screen, self.selected_option)
+        draw_footer(screen)
+        if self.progress is not None:
+            draw_progress(screen, *self.progress)
+        return None
+
+class CreditsScene(Scene):
+    """Credits page, Escape returns to the menu."""
+
+    size = (WIDTH, HEIGHT)
+    music = MENU_MUSIC
+
+    def enter(self):
+        self.drawn = False
+
+    def frame(self, dt, events):
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                # Return to menu
+                self.manager.switch('menu')
+
+        # The page never changes, so it is drawn once per visit
+        if self.drawn:
+            return []
+        self.drawn = True
+        screen = self.manager.screen
+        screen.fill(DARK_BLUE)
+        text = render_text(font(), "Credits", BLUE)
+        screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - 50))
+        details = render_text(small_font(), "Designed by: Oscar Kuo, Benson Chen", WHITE)
+        screen.blit(details, (WIDTH // 2 - details.get_width() // 2, HEIGHT // 2 + 50))
+        return None
+
+def main():
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    tracing.install_crash_dump(TRACE_DUMP_FILE)
+    manager = SceneManager(LAUNCH_TIME)
+    add_game_scenes(manager, complete_scene='credits')
+    # The first level, images and music load while the menu is up
+    manager.add('menu', MenuScene, manager.scenes['game'].warm_up)
+    manager.add('credits', CreditsScene)
+    manager.run('menu')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# swarm.py
+import numpy as np
+from config import *
+from game_logic import move_towards_targets
+import tracing
+
+trace = tracing.channel('ai')
+
+STATES = ('wander', 'follow', 'waiting')
+WANDER, FOLLOW, WAITING = range(len(STATES))
+
+class Swarm:
+    """Struct-of-arrays state for every tracker on a level, updated in batched NumPy operations.
+
+    Positions, speeds, states, timers and the current target live in arrays indexed by
+    tracker. Tracker objects are thin views over one row; paths stay on the Tracker
+    because they differ in length.
+    """
+
+    def __init__(self, capacity=8):
+        self.count = 0
+        self.members = []  # Tracker views, in row order
+        self.position = np.zeros((capacity, 2))  # Center in pixels
+        self.size = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.wander_speed = np.zeros(capacity)
+        self.follow_speed = np.zeros(capacity)
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.wander_timer = np.zeros(capacity)
+        self.waiting_timer = np.zeros(capacity)
+        self.teleport_timer = np.zeros(capacity)
+        self.target = np.zeros((capacity, 2))
+        self.has_target = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        capacity = max(len(self.speed) * 2, 1)
+        for name in ('position', 'size', 'speed', 'wander_speed', 'follow_speed', 'state',
+                     'wander_timer', 'waiting_timer', 'teleport_timer', 'target', 'has_target'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, tracker):
+        """Reserve a row for tracker and return its index."""
+        if self.count == len(self.speed):
+            self._grow()
+        index = self.count
+        self.count += 1
+        self.members.append(tracker)
+        return index
+
+    def positions(self):
+        return [tuple(center) for center in self.position[:self.count].astype(int).tolist()]
+
+    def collides(self, rect):
+        """True if any tracker overlaps rect, with the same strict test as colliderect."""
+        count = self.count
+        half_size = self.size[:count] / 2
+        position = self.position[:count]
+        overlap_x = np.abs(position[:, 0] - rect.centerx) < half_size + rect.width / 2
+        overlap_y = np.abs(position[:, 1] - rect.centery) < half_size + rect.height / 2
+        return bool(np.any(overlap_x & overlap_y))
+
+    def update(self, dt, player, distance_threshold, map_layout, walkable_tiles,
+               flow_field=None, reachability=None, line_of_sight=None):
+        count = self.count
+        if count == 0:
+            return
+        members = self.members
+        state = self.state[:count]
+        position = self.position[:count]
+
+        # Switch states from the player's distance
+        offset = np.array(player.rect.center, dtype=float) - position
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        near = distance <= distance_threshold
+        for i in np.flatnonzero(~near & (state != WANDER)):
+            tracker = members[i]
+            tracker.state = 'wander'
+            tracker.speed = tracker.wander_speed
+            tracker.initialize_tracker_target('wander', map_layout, walkable_tiles, player,
+                                              reachability=reachability)
+        player_tile = (player.rect.centery // TILE_SIZE, player.rect.centerx // TILE_SIZE)
+        spotting = np.flatnonzero(near & (state != FOLLOW))
+        # Spotting the player also needs a clear line of sight; a follower keeps chasing until out of range
+        if line_of_sight is not None and len(spotting):
+            tracker_tiles = position[spotting][:, ::-1].astype(int) // TILE_SIZE  # (row, col)
+            spotting = spotting[line_of_sight.can_see_many(tracker_tiles, player_tile)]
+        for i in spotting:
+            tracker = members[i]
+            tracker.state = 'follow'
+            tracker.speed = tracker.follow_speed
+            tracker.initialize_tracker_target('follow', map_layout, walkable_tiles, player, flow_field)
+
+        # Keep the shared flow field rooted at the player's tile, only while someone follows it
+        follow = state == FOLLOW
+        if flow_field is not None and follow.any():
+            flow_field.update(player_tile)
+
+        # Update based on state
+        wander = state == WANDER
+        waiting = state == WAITING
+
+        self.wander_timer[:count][wander] += dt
+        for i in np.flatnonzero(wander & ((self.wander_timer[:count] >= WANDER_INTERVAL) |
+                                          ~self.has_target[:count])):
+            members[i].initialize_tracker_target('wander', map_layout, walkable_tiles,
+                                                 reachability=reachability)
+
+        # Followers without a target plan this frame and start moving on the next one
+        plan_follow = follow & ~self.has_target[:count]
+        for i in np.flatnonzero(plan_follow):
+            members[i].initialize_tracker_target('follow', map_layout, walkable_tiles, player, flow_field)
+
+        self.waiting_timer[:count][waiting] += dt
+        for i in np.flatnonzero(waiting & (self.waiting_timer[:count] >= WAITING_DURATION)):
+            tracker = members[i]
+            trace.info("Waiting: Switching back to 'wander' state.")
+            tracker.state = 'wander'
+            tracker.speed = tracker.wander_speed
+            tracker.update_color(BLUE)
+            tracker.waiting_timer = 0
+            tracker.initialize_tracker_target('wander', map_layout, walkable_tiles,
+                                              reachability=reachability)
+
+        # Move everyone with a target along their path in one batch
+        moving = np.flatnonzero(self.has_target[:count] & (wander | (follow & ~plan_follow)))
+        if len(moving):
+            moved = position[moving]
+            reached = move_towards_targets(moved, self.target[moving], self.speed[moving], dt)
+            position[moving] = moved
+            for i in moving[reached]:
+                tracker = members[i]
+                tracker.advance_path()
+                # Replan at the next tile whenever the player has moved to another tile
+                if (tracker.state == 'follow' and flow_field is not None
+                        and flow_field.version != tracker.flow_field_version):
+                    tracker.current_target = None
+
+        # Teleport only if not in 'follow' state
+        not_following = state != FOLLOW
+        self.teleport_timer[:count][not_following] += dt
+        for i in np.flatnonzero(not_following & (self.teleport_timer[:count] >= 30.0)):  # 30 seconds
+            members[i].teleport_to_random_tile(walkable_tiles)
+            members[i].teleport_timer = 0
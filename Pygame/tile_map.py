@@ -0,0 +1,164 @@
+# tile_map.py
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Sequence
+import numpy as np
+from config import TILE_SIZE
+import tracing
+
+trace = tracing.channel('level')
+
+# Compiled cache: header, then one byte per tile in row-major order
+CACHE_MAGIC = b"ALTM"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("<4sHII32sii")  # magic, version, rows, cols, source sha256, goal row, goal col
+CACHE_SUFFIX = ".tilemap"
+
+FLOOR, WALL, GOAL = ord(" "), ord("W"), ord("G")
+
+class TileMap:
+    """Level grid stored as one byte per tile, with the goal and walkable indices precomputed."""
+
+    def __init__(self, rows, cols, grid, goal=None):
+        self.rows = rows
+        self.cols = cols
+        self.grid = grid  # bytes-like of rows * cols tile characters
+        self.goal = goal  # (row, col) of the 'G' tile, or None
+        self._layout = None
+        self._walkable_tiles = None
+
+    @classmethod
+    def from_layout(cls, map_layout):
+        """Build from a list of row strings. Short rows are padded with wall."""
+        rows = len(map_layout)
+        cols = max((len(row) for row in map_layout), default=0)
+        grid = "".join(row.ljust(cols, "W") for row in map_layout).encode("ascii")
+        goal_index = grid.find(GOAL.to_bytes(1, "little"))
+        goal = divmod(goal_index, cols) if goal_index != -1 else None
+        return cls(rows, cols, grid, goal)
+
+    @classmethod
+    def load(cls, file_path, use_cache=True):
+        """Load a .txt map, through its compiled cache when the source hash still matches."""
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        absolute_path = os.path.join(base_path, file_path)
+        with open(absolute_path, "rb") as f:
+            source = f.read()
+        source_hash = hashlib.sha256(source).digest()
+        cache_path = os.path.splitext(absolute_path)[0] + CACHE_SUFFIX
+
+        if use_cache:
+            tile_map = cls.read_cache(cache_path, source_hash)
+            if tile_map is not None:
+                return tile_map
+
+        lines = source.decode("utf-8").splitlines()
+        while lines and not lines[-1].strip():
+            lines.pop()
+        tile_map = cls.from_layout([line.rstrip("\r\n") for line in lines])
+        if use_cache:
+            tile_map.write_cache(cache_path, source_hash)
+        return tile_map
+
+    @classmethod
+    def read_cache(cls, cache_path, source_hash):
+        """Map the compiled grid into memory, or None if the cache is missing or stale."""
+        try:
+            with open(cache_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(mapped) < CACHE_HEADER.size:
+            mapped.close()
+            return None
+        magic, version, rows, cols, cached_hash, goal_row, goal_col = CACHE_HEADER.unpack_from(mapped)
+        if (magic != CACHE_MAGIC or version != CACHE_VERSION or cached_hash != source_hash
+                or len(mapped) != CACHE_HEADER.size + rows * cols):
+            trace.info("Tile map cache %s is stale, rebuilding", cache_path)
+            mapped.close()
+            return None
+        grid = memoryview(mapped)[CACHE_HEADER.size:]
+        goal = (goal_row, goal_col) if goal_row >= 0 else None
+        return cls(rows, cols, grid, goal)
+
+    def write_cache(self, cache_path, source_hash):
+        """Write the compiled grid next to the map.
+
+        The old cache may still be mapped by another level or process, so the new one is written
+        to a temporary file and swapped in whole rather than truncating the mapped file.
+        """
+        goal_row, goal_col = self.goal if self.goal is not None else (-1, -1)
+        header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, self.rows, self.cols, source_hash, goal_row, goal_col)
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix=CACHE_SUFFIX, dir=os.path.dirname(cache_path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                f.write(self.grid)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            trace.warning("Could not write tile map cache %s: %s", cache_path, e)
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def tile(self, row, col):
+        """Tile character at (row, col), or None outside the map."""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return chr(self.grid[row * self.cols + col])
+        return None
+
+    def is_walkable(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.grid[row * self.cols + col] == FLOOR
+
+    def mask(self, tiles):
+        """bytes with 1 for every tile whose character is in tiles, 0 elsewhere, row-major."""
+        table = bytearray(256)
+        for tile in tiles:
+            table[ord(tile)] = 1
+        return bytes(self.grid).translate(table)
+
+    @property
+    def layout(self):
+        """The map as a list of row strings, the format load_map returns."""
+        if self._layout is None:
+            text = bytes(self.grid).decode("ascii")
+            self._layout = [text[row * self.cols:(row + 1) * self.cols] for row in range(self.rows)]
+        return self._layout
+
+    @property
+    def walkable_tiles(self):
+        """(row, col, center_x, center_y) of every floor tile, like create_map returns."""
+        if self._walkable_tiles is None:
+            grid, cols = self.grid, self.cols
+            self._walkable_tiles = [
+                (index // cols, index % cols,
+                 index % cols * TILE_SIZE + TILE_SIZE // 2, index // cols * TILE_SIZE + TILE_SIZE // 2)
+                for index in range(self.rows * cols) if grid[index] == FLOOR
+            ]
+        return self._walkable_tiles
+
+    def goal_position(self):
+        """Pixel center of the goal tile, or None."""
+        if self.goal is None:
+            return None
+        return (self.goal[1] * TILE_SIZE + TILE_SIZE // 2, self.goal[0] * TILE_SIZE + TILE_SIZE // 2)
+
+class FloorTiles(Sequence):
+    """TileMap.walkable_tiles for maps too large for a tuple per tile, built on access instead.
+
+    Holds one int32 row-major index per floor tile, in the same order as walkable_tiles.
+    """
+
+    def __init__(self, tile_map):
+        self.cols = tile_map.cols
+        self.indices = np.flatnonzero(np.frombuffer(tile_map.mask(" "), dtype=np.uint8)).astype(np.int32)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, position):
+        row, col = divmod(int(self.indices[position]), self.cols)
+        return (row, col, col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2)
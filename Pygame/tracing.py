@@ -0,0 +1,136 @@
+# tracing.py
+import json
+import os
+import sys
+import time
+from collections import deque
+from config import TRACE_BUFFER_SIZE
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+OFF = 100
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error", OFF: "off"}
+LEVELS_BY_NAME = {name: level for level, name in LEVEL_NAMES.items()}
+
+# Most recent records, formatted only when dumped
+_ring = deque(maxlen=TRACE_BUFFER_SIZE)
+_channels = {}
+_default_level = INFO
+_echo_level = WARNING  # Records at or above this level are also printed to stderr
+_file = None
+
+class Channel:
+    """Named trace channel. A message below the channel level costs a single comparison."""
+
+    def __init__(self, name, level):
+        self.name = name
+        self.level = level
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, message, *args):
+        if level < self.level:
+            return
+        record = (time.time(), self.name, level, message, args)
+        _ring.append(record)
+        if _file is not None:
+            _file.write(json.dumps(record_to_dict(record)) + "\n")
+        if level >= _echo_level:
+            print(format_record(record), file=sys.stderr)
+
+    def debug(self, message, *args):
+        if DEBUG >= self.level:
+            self.log(DEBUG, message, *args)
+
+    def info(self, message, *args):
+        if INFO >= self.level:
+            self.log(INFO, message, *args)
+
+    def warning(self, message, *args):
+        if WARNING >= self.level:
+            self.log(WARNING, message, *args)
+
+    def error(self, message, *args):
+        if ERROR >= self.level:
+            self.log(ERROR, message, *args)
+
+def channel(name):
+    """Return the channel called name, creating it at the default level."""
+    if name not in _channels:
+        _channels[name] = Channel(name, _default_level)
+    return _channels[name]
+
+def record_message(record):
+    message, args = record[3], record[4]
+    return message % args if args else message
+
+def record_to_dict(record):
+    return {"time": record[0], "channel": record[1], "level": LEVEL_NAMES.get(record[2], record[2]),
+            "message": record_message(record)}
+
+def format_record(record):
+    stamp = time.strftime("%H:%M:%S", time.localtime(record[0]))
+    return f"{stamp} [{record[1]}] {LEVEL_NAMES.get(record[2], record[2])}: {record_message(record)}"
+
+def parse_level(level_name, default=None):
+    """Level for a name like "debug", or default with a warning if there is no such level."""
+    level = LEVELS_BY_NAME.get(level_name.strip().lower())
+    if level is None:
+        print(f"Unknown trace level {level_name!r}, ignored", file=sys.stderr)
+        return default
+    return level
+
+def configure(spec=None, file_path=None, echo=None):
+    """Set channel levels from a spec like "ai=debug,pathfinding=info" or "ai=debug,all=off".
+
+    "all" sets every other channel, wherever it appears in the spec. file_path appends every
+    record as JSON lines, echo sets the stderr level name. Unknown level names are skipped.
+    """
+    global _default_level, _echo_level, _file
+    if spec:
+        levels = {}
+        for item in spec.split(","):
+            name, _, level_name = item.strip().partition("=")
+            level = parse_level(level_name or "debug")
+            if level is not None:
+                levels[name.strip()] = level
+        if "all" in levels:
+            _default_level = levels.pop("all")
+            for existing in _channels.values():
+                existing.level = _default_level
+        for name, level in levels.items():
+            channel(name).level = level
+    if file_path:
+        if _file is not None:
+            _file.close()
+        _file = open(file_path, "a")
+    if echo:
+        _echo_level = parse_level(echo, _echo_level)
+
+def records():
+    return list(_ring)
+
+def dump(file_path=None):
+    """Write the ring buffer as JSON lines to file_path, or as text to stderr."""
+    if file_path is None:
+        for record in _ring:
+            print(format_record(record), file=sys.stderr)
+        return
+    with open(file_path, "w") as f:
+        for record in _ring:
+            f.write(json.dumps(record_to_dict(record)) + "\n")
+
+def install_crash_dump(file_path):
+    """Dump the ring buffer to file_path when an uncaught exception ends the program."""
+    previous_hook = sys.excepthook
+
+    def crash_hook(exc_type, exc_value, traceback):
+        channel("level").error("Crashed: %s: %s", exc_type.__name__, exc_value)
+        dump(file_path)
+        previous_hook(exc_type, exc_value, traceback)
+
+    sys.excepthook = crash_hook
+
+# Configure from the environment, e.g. ALIENATION_TRACE="ai=debug" ALIENATION_TRACE_FILE=trace.jsonl
+configure(os.environ.get("ALIENATION_TRACE"), os.environ.get("ALIENATION_TRACE_FILE"),
+          os.environ.get("ALIENATION_TRACE_ECHO"))
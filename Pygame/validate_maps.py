@@ -0,0 +1,121 @@
+# validate_maps.py
+"""Check maps for connectivity, a reachable goal and room to spawn, across a process pool.
+
+    python validate_maps.py                                   # every map in map/
+    python validate_maps.py map/map1.txt map/map2.txt
+    python validate_maps.py --generate 1000 --size 40 --kind ship --output report.json
+
+Exit code 1 if any map fails.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config import CHUNK_SIZE
+from map_generator import generate_map, generate_ship
+from tile_map import TileMap
+from reachability import Reachability
+from spawns import SpawnIndex
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def build_layout(job):
+    """Row strings of a job: ("file", path) or ("generated", kind, size, seed)."""
+    if job[0] == "file":
+        return TileMap.load(job[1], use_cache=False).layout
+    _, kind, size, seed = job
+    if kind == "ship":
+        chunks = max(size // CHUNK_SIZE, 1)
+        return generate_ship(chunks, chunks, CHUNK_SIZE, seed)
+    return generate_map(size, size, 0.3, kind == "maze", seed)
+
+def validate(job):
+    """Report for one map, safe to run in a worker process."""
+    start = time.perf_counter()
+    layout = build_layout(job)
+    built = time.perf_counter()
+    tile_map = TileMap.from_layout(layout)
+    report = {"map": job[1] if job[0] == "file" else f"{job[1]}-{job[2]}-{job[3]}",
+              "rows": tile_map.rows, "cols": tile_map.cols, "errors": []}
+    walkable_tiles = tile_map.walkable_tiles
+    reachability = Reachability(layout, walkable_tiles, max_table_tiles=0)  # Components only
+    largest = max((len(members) for members in reachability.components), default=0)
+    report.update(floor=len(walkable_tiles), components=len(reachability.components),
+                  largest_component=round(largest / len(walkable_tiles), 4) if walkable_tiles else 0.0)
+
+    if tile_map.goal is None:
+        report["errors"].append("no goal")
+        report["goal_reachable"] = 0.0
+    else:
+        goal_row, goal_col = tile_map.goal
+        reaching = {reachability.component_of[reachability.index[tile]]
+                    for tile in ((goal_row - 1, goal_col), (goal_row + 1, goal_col),
+                                 (goal_row, goal_col - 1), (goal_row, goal_col + 1))
+                    if tile in reachability.index}
+        reached = sum(len(reachability.components[label]) for label in reaching)
+        report["goal_reachable"] = round(reached / len(walkable_tiles), 4) if walkable_tiles else 0.0
+        if not reached:
+            report["errors"].append("goal unreachable")
+
+    report["player_spawns"] = 0
+    if tile_map.goal is not None and walkable_tiles:
+        try:
+            report["player_spawns"] = len(SpawnIndex(tile_map, reachability).player_tiles)
+        except ValueError as e:
+            report["errors"].append(str(e))
+    report["ok"] = not report["errors"]
+    report["build_ms"] = round((built - start) * 1000, 3)
+    report["check_ms"] = round((time.perf_counter() - built) * 1000, 3)
+    return report
+
+def summarize(reports, elapsed):
+    check_ms = sorted(report["check_ms"] for report in reports)
+    return {"maps": len(reports), "failed": sum(not report["ok"] for report in reports),
+            "seconds": round(elapsed, 3), "maps_per_second": round(len(reports) / elapsed, 1) if elapsed else 0.0,
+            "median_check_ms": round(statistics.median(check_ms), 3) if check_ms else 0.0,
+            "p95_check_ms": round(check_ms[min(int(len(check_ms) * 0.95), len(check_ms) - 1)], 3) if check_ms else 0.0}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("maps", nargs="*", help="map files, relative to the game directory (default: map/*.txt)")
+    parser.add_argument("--generate", type=int, default=0, help="check this many generated maps instead")
+    parser.add_argument("--size", type=int, default=40, help="side of generated maps in tiles")
+    parser.add_argument("--kind", choices=("maze", "scatter", "ship"), default="maze")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first generated map")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--output", help="write the full report as JSON to this file")
+    args = parser.parse_args()
+
+    if args.generate:
+        jobs = [("generated", args.kind, args.size, args.seed + i) for i in range(args.generate)]
+    else:
+        paths = args.maps or sorted(os.path.relpath(path, BASE_DIR)
+                                    for path in glob.glob(os.path.join(BASE_DIR, "map", "*.txt")))
+        jobs = [("file", path) for path in paths]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        reports = list(executor.map(validate, jobs, chunksize=max(len(jobs) // 64, 1)))
+    summary = summarize(reports, time.perf_counter() - start)
+
+    for report in reports:
+        if not args.generate or not report["ok"]:  # Generated maps are only listed when they fail
+            status = "ok" if report["ok"] else "FAIL " + "; ".join(report["errors"])
+            print(f"{report['map']:<24}{report['rows']:>5}x{report['cols']:<5}{report['floor']:>7} floor"
+                  f"{report['components']:>5} comp  goal {report['goal_reachable']:>6.1%}"
+                  f"{report['player_spawns']:>7} spawns{report['check_ms']:>9.2f} ms  {status}")
+    print(f"{summary['maps']} maps, {summary['failed']} failed, {summary['seconds']}s "
+          f"({summary['maps_per_second']}/s), check median {summary['median_check_ms']} ms, "
+          f"p95 {summary['p95_check_ms']} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "maps": reports}, f, indent=2)
+    if summary["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# warmup.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from assets import preload_image, preload_music
+import tracing
+
+trace = tracing.channel('assets')
+
+class Warmup:
+    """Loads what a scene will need on worker threads while another scene is shown.
+
+    Images are decoded and music files read into memory on one worker; levels are built by
+    the level loader's own worker. Images and levels are required before play, music is not:
+    it is streamed from disk if it is not in memory yet. on_ready(time) is called, from a
+    worker thread, once everything required is loaded.
+    """
+
+    def __init__(self, images=(), music=(), loader=None, levels=(0,), on_ready=None):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup")
+        self.started = time.perf_counter()
+        self.ready_at = None
+        self.on_ready = on_ready
+        self.required = {}  # Name -> Future
+        self.optional = {}
+        if loader is not None:
+            for level_index in levels:
+                loader.preload(level_index)
+                self.required[f"level {level_index + 1}"] = loader.pending[level_index]
+        for file_path in images:
+            self.required[file_path] = self.executor.submit(preload_image, file_path)
+        for file_path in music:
+            self.optional[file_path] = self.executor.submit(preload_music, file_path)
+
+        self._lock = threading.Lock()
+        self._remaining = len(self.required)
+        if not self.required:
+            self._ready()
+        for future in self.required.values():
+            future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        with self._lock:
+            self._remaining -= 1
+            done = self._remaining == 0
+        if done:
+            self._ready()
+
+    def _ready(self):
+        self.ready_at = time.perf_counter()
+        trace.info("Warm-up finished in %.1f ms", (self.ready_at - self.started) * 1000)
+        if self.on_ready is not None:
+            self.on_ready(self.ready_at)
+
+    @property
+    def ready(self):
+        return self.ready_at is not None
+
+    def progress(self):
+        """(tasks done, tasks in total), music included."""
+        futures = list(self.required.values()) + list(self.optional.values())
+        return sum(future.done() for future in futures), len(futures)
+
+    def wait(self):
+        """Block until everything required is loaded. Failures are left for the normal load to raise."""
+        for name, future in self.required.items():
+            try:
+                future.result()
+            except Exception as e:
+                trace.warning("Warm-up of %s failed: %s", name, e)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
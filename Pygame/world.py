@@ -0,0 +1,172 @@
+# world.py
+"""Stream a large map chunk by chunk around a moving view.
+
+    python world.py [chunk rows] [chunk cols] [seed]    # walk across a generated ship, print the chunk counts
+"""
+import sys
+import time
+from collections import OrderedDict
+import pygame
+from config import *
+from map_generator import generate_chunk
+from map_resources import create_map
+from tile_map import TileMap
+from rendering import bake_background
+from assets import display_ready
+import tracing
+
+trace = tracing.channel('level')
+
+class Chunk:
+    """Tiles of one chunk_size square of the map, with walls and floor baked once it is drawn."""
+
+    def __init__(self, chunk_row, chunk_col, layout, chunk_size):
+        self.key = (chunk_row, chunk_col)
+        self.origin = (chunk_row * chunk_size, chunk_col * chunk_size)  # (row, col) of the first tile
+        self.layout = layout
+        self.tile_map = TileMap.from_layout(layout)
+        self.rect = pygame.Rect(self.origin[1] * TILE_SIZE, self.origin[0] * TILE_SIZE,
+                                self.tile_map.cols * TILE_SIZE, self.tile_map.rows * TILE_SIZE)
+        self.background = None
+
+    def bake(self):
+        """Build the wall sprites, in map coordinates, and draw them with the floor onto background."""
+        walls, _ = create_map(self.layout, self.origin)
+        self.background = bake_background(walls, self.rect.size, display_ready(), self.rect.topleft)
+
+class ChunkedWorld:
+    """A map too large to build at once, materialized only around the view.
+
+    load_chunk(chunk_row, chunk_col) returns the chunk's tiles as row strings. update() loads
+    the chunks within CHUNK_MARGIN tiles of the view and drops those beyond twice that, so
+    memory and load time follow the size of the view rather than the size of the map. Tile
+    and collision queries load the chunk they need if update() has not. With bake, chunks get
+    their background as they load, ahead of the view; otherwise the first time they are drawn.
+    """
+
+    def __init__(self, rows, cols, load_chunk, goal=None, chunk_size=CHUNK_SIZE, margin=CHUNK_MARGIN, bake=True):
+        self.rows, self.cols = rows, cols
+        self.load_chunk = load_chunk
+        self.goal = goal  # (row, col) of the 'G' tile, or None
+        self.chunk_size = chunk_size
+        self.margin = margin
+        self.bake = bake
+        self.chunk_rows = -(-rows // chunk_size)
+        self.chunk_cols = -(-cols // chunk_size)
+        self.chunks = OrderedDict()  # (chunk row, chunk col) -> Chunk, least recently used first
+        self.loads = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_tile_map(cls, tile_map, **kwargs):
+        """Stream a loaded map. Its grid is one byte per tile, so only the built objects are saved."""
+        layout = tile_map.layout
+        size = kwargs.get("chunk_size", CHUNK_SIZE)
+
+        def load_chunk(chunk_row, chunk_col):
+            top, left = chunk_row * size, chunk_col * size
+            return [row[left:left + size] for row in layout[top:top + size]]
+
+        return cls(tile_map.rows, tile_map.cols, load_chunk, tile_map.goal, **kwargs)
+
+    @classmethod
+    def generated(cls, chunk_rows, chunk_cols, seed=0, **kwargs):
+        """Stream a ship from map_generator, never building more of it than the view needs."""
+        size = kwargs.get("chunk_size", CHUNK_SIZE)
+
+        def load_chunk(chunk_row, chunk_col):
+            return generate_chunk(chunk_row, chunk_col, chunk_rows, chunk_cols, size, seed)
+
+        # generate_chunk puts the goal at the center of the last chunk
+        last = load_chunk(chunk_rows - 1, chunk_cols - 1)
+        goal_row = next(row for row, line in enumerate(last) if 'G' in line)
+        goal = ((chunk_rows - 1) * size + goal_row, (chunk_cols - 1) * size + last[goal_row].index('G'))
+        return cls(chunk_rows * size, chunk_cols * size, load_chunk, goal, **kwargs)
+
+    def chunk(self, chunk_row, chunk_col):
+        """The chunk at (chunk_row, chunk_col), built now if it is not loaded."""
+        key = (chunk_row, chunk_col)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = Chunk(chunk_row, chunk_col, self.load_chunk(chunk_row, chunk_col),
+                                             self.chunk_size)
+            self.loads += 1
+            trace.debug("Loaded chunk %s", key)
+        else:
+            self.chunks.move_to_end(key)
+        if self.bake and chunk.background is None:
+            chunk.bake()
+        return chunk
+
+    def chunk_range(self, view, margin):
+        """Keys of the chunks overlapping view, a pixel rect, grown by margin tiles on every side."""
+        span = self.chunk_size * TILE_SIZE
+        grown = view.inflate(2 * margin * TILE_SIZE, 2 * margin * TILE_SIZE)
+        first_row, last_row = max(grown.top // span, 0), min((grown.bottom - 1) // span, self.chunk_rows - 1)
+        first_col, last_col = max(grown.left // span, 0), min((grown.right - 1) // span, self.chunk_cols - 1)
+        return [(row, col) for row in range(first_row, last_row + 1) for col in range(first_col, last_col + 1)]
+
+    def update(self, view):
+        """Load the chunks around view and drop the ones far from it."""
+        for key in self.chunk_range(view, self.margin):
+            self.chunk(*key)
+        keep = set(self.chunk_range(view, 2 * self.margin))
+        for key in [key for key in self.chunks if key not in keep]:
+            del self.chunks[key]
+            self.evictions += 1
+            trace.debug("Dropped chunk %s", key)
+
+    def tile(self, row, col):
+        """Tile character at (row, col), or None outside the map."""
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+        chunk = self.chunk(row // self.chunk_size, col // self.chunk_size)
+        return chunk.tile_map.tile(row - chunk.origin[0], col - chunk.origin[1])
+
+    def is_walkable(self, row, col):
+        return self.tile(row, col) == ' '
+
+    def is_solid(self, row, col):
+        return self.tile(row, col) == 'W'
+
+    def collides(self, rect):
+        """Same result as CollisionGrid.collides on the whole map, so the player can move through it."""
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        first_row = max(rect.top // TILE_SIZE, 0)
+        last_row = min((rect.bottom - 1) // TILE_SIZE, self.rows - 1)
+        first_col = max(rect.left // TILE_SIZE, 0)
+        last_col = min((rect.right - 1) // TILE_SIZE, self.cols - 1)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                if self.is_solid(row, col):
+                    return True
+        return False
+
+    def draw(self, screen, view, area=None):
+        """Blit the baked chunks in view, a map rect shown from the screen's top left, onto screen.
+
+        area limits drawing to the chunks overlapping that part of view.
+        """
+        for key in self.chunk_range(area if area is not None else view, 0):
+            chunk = self.chunk(*key)
+            if chunk.background is None:
+                chunk.bake()
+            screen.blit(chunk.background, (chunk.rect.x - view.x, chunk.rect.y - view.y))
+
+if __name__ == "__main__":
+    chunk_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    chunk_cols = int(sys.argv[2]) if len(sys.argv) > 2 else chunk_rows
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    world = ChunkedWorld.generated(chunk_rows, chunk_cols, seed, bake=False)
+    view = pygame.Rect(0, 0, WIDTH, HEIGHT)
+    start = time.perf_counter()
+    most = 0
+    # Walk the view diagonally across the whole map
+    while view.right < world.cols * TILE_SIZE and view.bottom < world.rows * TILE_SIZE:
+        world.update(view)
+        most = max(most, len(world.chunks))
+        view.move_ip(TILE_SIZE, TILE_SIZE)
+    elapsed = time.perf_counter() - start
+    print(f"{world.rows}x{world.cols} tiles: {world.loads} chunk loads, {world.evictions} evictions, "
+          f"at most {most} chunks loaded, {elapsed:.2f}s")